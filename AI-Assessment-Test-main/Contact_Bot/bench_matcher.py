@@ -0,0 +1,99 @@
+# bench_matcher.py
+"""
+Intent-matching throughput: the compiled Aho-Corasick matcher vs. the original
+per-key substring scan, over the built-in FAQ padded with synthetic entries, plus
+the latency of the fuzzy TF-IDF lookup (uncached, i.e. every message new).
+
+    python bench_matcher.py --faqs 100 1000 5000 --messages 2000
+    python bench_matcher.py --faq-file data/faq.csv
+"""
+import argparse
+import random
+import time
+
+from contact_bot import qa_pairs, RESET_TRIGGERS, CONTACT_TRIGGERS
+from faq_retrieval import normalize
+from intent_matcher import IntentMatcher, load_faq_file, RESET, CONTACT, FAQ
+
+WORDS = ("course exam fee refund schedule batch mentor placement syllabus certificate login "
+         "password portal deadline internship project quiz grade hostel library timing").split()
+
+
+def naive_match(message, qa):
+    """The original chat() logic: reset triggers, then contact triggers, then every FAQ key"""
+    if any(trigger in message for trigger in RESET_TRIGGERS):
+        return RESET
+    if any(trigger in message for trigger in CONTACT_TRIGGERS):
+        return CONTACT
+    for question in qa:
+        if question in message:
+            return question
+    return None
+
+
+def _label(intent):
+    if intent is None:
+        return None
+    return intent[1] if intent[0] == FAQ else intent[0]
+
+
+def synthetic_faq(count, rng):
+    pairs = {question.lower(): answer for question, answer in qa_pairs.items()}
+    while len(pairs) < count:
+        question = " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 4))) + f" {len(pairs)}"
+        pairs[question] = f"Answer {len(pairs)}"
+    return pairs
+
+
+def messages(qa, count, rng):
+    questions = list(qa)
+    out = []
+    for _ in range(count):
+        filler = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+        out.append(f"{filler} {rng.choice(questions)}?" if rng.random() < 0.7 else filler)
+    return out
+
+
+def bench(qa, msgs):
+    t0 = time.perf_counter()
+    matcher = IntentMatcher(RESET_TRIGGERS, CONTACT_TRIGGERS, qa)
+    build = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    fast = [matcher.match(m) for m in msgs]
+    t_fast = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    slow = [naive_match(m, qa) for m in msgs]
+    t_slow = time.perf_counter() - t0
+
+    mismatches = sum(1 for f, s in zip(fast, slow) if _label(f) != s)
+
+    retriever = matcher.retriever
+    t0 = time.perf_counter()
+    for m in msgs:
+        retriever._lookup(normalize(m))
+    t_fuzzy = (time.perf_counter() - t0) / len(msgs)
+    return build, len(msgs) / t_fast, len(msgs) / t_slow, mismatches, t_fuzzy
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Contact bot intent-matching benchmark")
+    parser.add_argument("--faqs", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument("--faq-file", help="benchmark a real question,answer CSV instead of synthetic FAQs")
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    sets = [(args.faq_file, load_faq_file(args.faq_file))] if args.faq_file else \
+        [(str(n), synthetic_faq(n, rng)) for n in args.faqs]
+    print(f"{'FAQs':>8} {'build ms':>9} {'automaton msg/s':>16} {'scan msg/s':>11} {'speedup':>8} "
+          f"{'mismatches':>11} {'fuzzy ms':>9}")
+    for label, qa in sets:
+        build, fast, slow, mismatches, fuzzy = bench(qa, messages(qa, args.messages, rng))
+        print(f"{label:>8} {build * 1000:>9.1f} {fast:>16.0f} {slow:>11.0f} {fast / slow:>7.1f}x "
+              f"{mismatches:>11} {fuzzy * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,11 +3,20 @@ import csv
 import os
 import re
 
+from intent_matcher import ReloadingMatcher, RESET, CONTACT, FAQ
+from session_store import (create_session_store, new_session_id, valid_session_id,
+                           EMPTY_STATE, SESSION_COOKIE, SESSION_TTL)
+
 app = Flask(__name__)
 
 CONTACT_FILE = os.path.join("data", "contacts.csv")
+FAQ_FILE = os.path.join("data", "faq.csv")   # optional question,answer rows; reloaded when it changes
+RESET_TRIGGERS = ["new chat", "start over", "clear chat", "reset"]
+CONTACT_TRIGGERS = ["enroll", "talk", "contact", "message", "reach", "want to join"]
 
-user_states = {}
+# Contact-flow state per conversation, with TTL expiry; SESSION_BACKEND=sqlite shares it
+# between worker processes (see session_store.py)
+sessions = create_session_store()
 
 # Dramatic and funny chatbot responses
 qa_pairs = {
@@ -37,6 +46,9 @@ qa_pairs = {
     "Thankyou": "your welcome"
 }
 
+# Reset triggers, contact triggers and FAQ questions matched in one pass (see intent_matcher.py)
+intents = ReloadingMatcher(RESET_TRIGGERS, CONTACT_TRIGGERS, qa_pairs, FAQ_FILE)
+
 def is_valid_email(email):
     return re.match(r"[^@]+@[^@]+\.[^@]+", email)
 
@@ -46,56 +58,64 @@ def index():
 @app.route("/chat", methods=["POST"])
 def chat():
     user_input = request.json.get("message", "").lower()
-    user_id = request.remote_addr  # simplistic user session
-    user_state = user_states.get(user_id, {"step": None, "data": {}})
+    # Conversations are keyed by a cookie, not the client IP, so users behind one NAT stay apart
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if not valid_session_id(session_id):
+        session_id = new_session_id()
+    response = jsonify({"reply": respond(user_input, session_id)})
+    response.set_cookie(SESSION_COOKIE, session_id, max_age=SESSION_TTL, httponly=True, samesite="Lax")
+    return response
+
+def respond(user_input, session_id):
+    user_state = sessions.get(session_id)
+    matcher = intents.current()
+    intent = matcher.match(user_input)
+    kind = intent[0] if intent else None
 
     # Reset flow if user says 'new chat', 'start over', or 'clear chat'
-    if any(keyword in user_input for keyword in ["new chat", "start over", "clear chat", "reset"]):
-        user_states[user_id] = {"step": None, "data": {}}
-        return jsonify({"reply": "Alright! Let's start fresh. You can say 'I want to enroll' or ask me anything."})
+    if kind == RESET:
+        sessions.delete(session_id)
+        return "Alright! Let's start fresh. You can say 'I want to enroll' or ask me anything."
 
     # Contact detail steps
-    if user_state["step"] == "name":
-        user_state["data"]["name"] = user_input
-        user_state["step"] = "email"
-        user_states[user_id] = user_state
-        return jsonify({"reply": "Thanks! Now, can you give me your email address?"})
+    if user_state.step == "name":
+        sessions.set(session_id, user_state._replace(step="email", name=user_input))
+        return "Thanks! Now, can you give me your email address?"
 
-    elif user_state["step"] == "email":
+    elif user_state.step == "email":
         if is_valid_email(user_input):
-            user_state["data"]["email"] = user_input
-            user_state["step"] = "message"
-            user_states[user_id] = user_state
-            return jsonify({"reply": "Awesome! Finally, what message would you like to send us?"})
+            sessions.set(session_id, user_state._replace(step="message", email=user_input))
+            return "Awesome! Finally, what message would you like to send us?"
         else:
-            return jsonify({"reply": "Hmm, that doesn't look like a valid email. Can you try again?"})
+            return "Hmm, that doesn't look like a valid email. Can you try again?"
 
-    elif user_state["step"] == "message":
-        user_state["data"]["message"] = user_input
+    elif user_state.step == "message":
         with open(CONTACT_FILE, "a", newline="") as f:
             writer = csv.writer(f)
-            writer.writerow([
-                user_state["data"]["name"],
-                user_state["data"]["email"],
-                user_state["data"]["message"]
-            ])
-        user_states.pop(user_id, None)
-        return jsonify({"reply": "Thank you! Your message has been received and saved. Our team will reach out to you soon."})
+            writer.writerow([user_state.name, user_state.email, user_input])
+        sessions.delete(session_id)
+        return "Thank you! Your message has been received and saved. Our team will reach out to you soon."
+
+    # Nothing matched exactly: closest FAQ question, for misspellings and paraphrases
+    # (see faq_retrieval.py); questions holding a trigger resolve to that trigger
+    if intent is None:
+        intent = matcher.closest(user_input)
+        kind = intent[0] if intent else None
+        if kind == RESET:
+            sessions.delete(session_id)
+            return "Alright! Let's start fresh. You can say 'I want to enroll' or ask me anything."
 
     # Trigger contact flow
-    contact_triggers = ["enroll", "talk", "contact", "message", "reach", "want to join"]
-    if any(trigger in user_input for trigger in contact_triggers):
-        user_states[user_id] = {"step": "name", "data": {}}
-        return jsonify({"reply": "Sure! Let's get started. What's your name?"})
+    if kind == CONTACT:
+        sessions.set(session_id, EMPTY_STATE._replace(step="name"))
+        return "Sure! Let's get started. What's your name?"
 
     # General responses
-    for question, answer in qa_pairs.items():
-        if question in user_input:
-            return jsonify({"reply": answer})
+    if kind == FAQ:
+        return matcher.answer(intent[1])
 
     # Fallback
-    return jsonify({"reply": "I'm your friendly AI assistant. Ask me anything or say 'I want to contact' to get started."})
-
+    return "I'm your friendly AI assistant. Ask me anything or say 'I want to contact' to get started."
 
 if __name__ == "__main__":
     os.makedirs("data", exist_ok=True)
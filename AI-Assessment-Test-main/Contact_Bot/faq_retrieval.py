@@ -0,0 +1,81 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+try:
+    import numpy as np
+except ImportError:  # optional, like scikit-learn: without it only exact matching is used
+    np = None
+
+# === SETTINGS ===
+NGRAM_RANGE = (2, 4)        # character n-grams, within word boundaries
+MATCH_THRESHOLD = 0.6       # minimum cosine similarity to answer instead of falling back
+QUERY_CACHE_SIZE = 4096     # memoized normalized messages per index
+MIN_QUERY_CHARS = 3
+
+_SPACES = re.compile(r"\s+")
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+def normalize(message):
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", message.lower())).strip()
+
+
+class FaqRetriever:
+    """Fuzzy FAQ lookup: character n-gram TF-IDF over the questions, cosine similarity.
+
+    scikit-learn fits the vocabulary and IDF weights once; the L2-normalized question
+    matrix is kept as CSR. A message is turned into the same TF-IDF vector directly
+    (sklearn's transform() costs more than the lookup itself) and scored against every
+    question with one sparse matrix-vector product. Results are memoized per normalized
+    message. numpy and scikit-learn are optional; without them match() always returns None."""
+
+    def __init__(self, qa_pairs, threshold=MATCH_THRESHOLD, ngram_range=NGRAM_RANGE,
+                 cache_size=QUERY_CACHE_SIZE):
+        self.questions = list(qa_pairs)
+        self.threshold = threshold
+        self.enabled = False
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+        except ImportError:
+            TfidfVectorizer = None
+        if np is None or TfidfVectorizer is None:
+            print("[FAQ Retrieval] numpy/scikit-learn not installed, fuzzy matching disabled")
+            return
+        if not self.questions:
+            return
+        vectorizer = TfidfVectorizer(analyzer="char_wb", ngram_range=ngram_range,
+                                     preprocessor=normalize, sublinear_tf=True)
+        self.matrix = vectorizer.fit_transform(self.questions).tocsr()
+        self.vocabulary = vectorizer.vocabulary_
+        self.idf = vectorizer.idf_
+        self.analyze = vectorizer.build_analyzer()
+        self.enabled = True
+
+    def vectorize(self, message):
+        """Dense TF-IDF vector for message, matching TfidfVectorizer.transform (None if no known n-grams)"""
+        vector = np.zeros(len(self.idf))
+        for gram, count in Counter(self.analyze(message)).items():
+            column = self.vocabulary.get(gram)
+            if column is not None:
+                vector[column] = (1.0 + math.log(count)) * self.idf[column]
+        norm = np.sqrt(vector @ vector)
+        return vector / norm if norm else None
+
+    def _lookup(self, message):
+        if not self.enabled or len(message) < MIN_QUERY_CHARS:
+            return None
+        vector = self.vectorize(message)
+        if vector is None:
+            return None
+        scores = self.matrix @ vector
+        best = int(scores.argmax())
+        if scores[best] < self.threshold:
+            return None
+        return self.questions[best], float(scores[best])
+
+    def match(self, message):
+        """(question, score) of the closest FAQ question above the threshold, else None"""
+        return self.lookup(normalize(message))
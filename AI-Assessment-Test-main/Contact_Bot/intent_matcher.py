@@ -0,0 +1,205 @@
+import csv
+import os
+import threading
+import time
+from collections import deque
+
+from faq_retrieval import FaqRetriever
+
+# === SETTINGS ===
+RELOAD_CHECK_INTERVAL = 2.0   # seconds between FAQ file mtime checks
+
+RESET = "reset"
+CONTACT = "contact"
+FAQ = "faq"
+
+
+class AhoCorasick:
+    """Multi-pattern substring matcher: built once, then finds every pattern in one pass.
+
+    Each pattern carries a priority (lower wins); best() returns the best-priority pattern
+    occurring anywhere in the text without collecting all matches."""
+
+    def __init__(self, patterns):
+        # patterns: iterable of (pattern, priority, value)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]      # pattern ids ending at this node (including via fail links)
+        self._best = [None]   # best-priority pattern id ending at this node
+        self._rank = []       # per node: position of _best in priority order (len(patterns) if none)
+        self.patterns = []
+        for pattern, priority, value in patterns:
+            if not pattern:
+                continue
+            self._add(pattern, len(self.patterns))
+            self.patterns.append((pattern, priority, value))
+        self._build()
+
+    def _add(self, pattern, pattern_id):
+        node = 0
+        for char in pattern:
+            nxt = self._goto[node].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._best.append(None)
+            node = nxt
+        self._out[node].append(pattern_id)
+
+    def _better(self, a, b):
+        if a is None:
+            return b
+        if b is None:
+            return a
+        return a if (self.patterns[a][1], a) <= (self.patterns[b][1], b) else b
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        for node, out in enumerate(self._out):
+            for pattern_id in out:
+                self._best[node] = self._better(self._best[node], pattern_id)
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+                self._best[child] = self._better(self._best[child], self._best[self._fail[child]])
+                queue.append(child)
+        self._by_rank = sorted(range(len(self.patterns)), key=lambda i: (self.patterns[i][1], i))
+        order = {pattern_id: rank for rank, pattern_id in enumerate(self._by_rank)}
+        self._rank = [len(self.patterns) if best is None else order[best] for best in self._best]
+
+    def _step(self, node, char):
+        while node and char not in self._goto[node]:
+            node = self._fail[node]
+        return self._goto[node].get(char, 0)
+
+    def iter_matches(self, text):
+        """Yield (end_index, pattern, priority, value) for every occurrence"""
+        node = 0
+        for i, char in enumerate(text):
+            node = self._step(node, char)
+            for pattern_id in self._out[node]:
+                pattern, priority, value = self.patterns[pattern_id]
+                yield i + 1, pattern, priority, value
+
+    def best(self, text):
+        """(pattern, priority, value) with the lowest priority found in text, else None"""
+        goto, fail, rank = self._goto, self._fail, self._rank
+        node, best = 0, len(self.patterns)
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if rank[node] < best:
+                best = rank[node]
+        return None if best == len(self.patterns) else self.patterns[self._by_rank[best]]
+
+
+class IntentMatcher:
+    """Reset triggers, contact triggers and FAQ questions compiled into one automaton.
+
+    Priority matches the order chat() used to check them: any reset trigger beats any
+    contact trigger, which beats any FAQ question; FAQ questions keep their insertion order.
+    Patterns are lowercased, like the incoming message. A fuzzy FaqRetriever over the same
+    questions is built alongside, so both are replaced together on reload."""
+
+    def __init__(self, reset_triggers, contact_triggers, qa_pairs):
+        self.qa_pairs = dict(qa_pairs)
+        patterns = []
+        for trigger in reset_triggers:
+            patterns.append((trigger.lower(), 0, (RESET, trigger)))
+        for trigger in contact_triggers:
+            patterns.append((trigger.lower(), 1, (CONTACT, trigger)))
+        for rank, question in enumerate(self.qa_pairs):
+            patterns.append((question.lower(), 2 + rank, (FAQ, question)))
+        self.automaton = AhoCorasick(patterns)
+        self.retriever = FaqRetriever(self.qa_pairs)
+
+    def match(self, message):
+        """(kind, key) of the highest-priority intent in message, or None"""
+        best = self.automaton.best(message.lower())
+        return None if best is None else best[2]
+
+    def closest(self, message):
+        """(kind, key) for the FAQ question most similar to message (misspellings, paraphrases), or None.
+
+        A question that itself contains a reset or contact trigger (e.g. "i want to enroll")
+        resolves to that trigger, the same as an exact match would, so a misspelling starts
+        the contact flow instead of returning the question's canned answer."""
+        found = self.retriever.match(message)
+        if found is None:
+            return None
+        shadow = self.match(found[0])
+        if shadow is not None and shadow[0] in (RESET, CONTACT):
+            return shadow
+        return FAQ, found[0]
+
+    def answer(self, question):
+        return self.qa_pairs[question]
+
+
+def load_faq_file(path):
+    """question,answer rows from a CSV file (header row optional), in file order"""
+    pairs = {}
+    with open(path, newline="", encoding="utf-8") as faq_file:
+        for row in csv.reader(faq_file):
+            if len(row) < 2 or not row[0].strip() or row[0].strip().lower() == "question":
+                continue
+            pairs[row[0].strip().lower()] = row[1].strip()
+    return pairs
+
+
+class ReloadingMatcher:
+    """IntentMatcher over built-in FAQs plus an optional FAQ file, rebuilt when the file changes.
+
+    File entries override built-in answers and add new questions after them. The mtime is
+    checked at most every RELOAD_CHECK_INTERVAL seconds; the new matcher is built off to
+    the side and swapped in, so requests never see a half-built automaton."""
+
+    def __init__(self, reset_triggers, contact_triggers, qa_pairs, faq_path=None,
+                 check_interval=RELOAD_CHECK_INTERVAL):
+        self.reset_triggers = list(reset_triggers)
+        self.contact_triggers = list(contact_triggers)
+        self.builtin_pairs = dict(qa_pairs)
+        self.faq_path = faq_path
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self.matcher = self._build()
+
+    def _file_mtime(self):
+        try:
+            return os.stat(self.faq_path).st_mtime
+        except (OSError, TypeError):
+            return None
+
+    def _build(self):
+        pairs = dict(self.builtin_pairs)
+        mtime = self._file_mtime()
+        if mtime is not None:
+            try:
+                pairs.update(load_faq_file(self.faq_path))
+            except (OSError, UnicodeDecodeError, csv.Error) as e:
+                print(f"[FAQ Error] Could not load {self.faq_path}: {e}")
+        self._mtime = mtime
+        return IntentMatcher(self.reset_triggers, self.contact_triggers, pairs)
+
+    def current(self):
+        now = time.monotonic()
+        if now - self._checked >= self.check_interval and self._lock.acquire(blocking=False):
+            try:
+                self._checked = now
+                if self._file_mtime() != self._mtime:
+                    self.matcher = self._build()
+                    print(f"[FAQ] Reloaded {len(self.matcher.qa_pairs)} entries from {self.faq_path}")
+            finally:
+                self._lock.release()
+        return self.matcher
@@ -0,0 +1,160 @@
+import os
+import re
+import secrets
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# === SETTINGS ===
+SESSION_TTL = 30 * 60          # seconds a conversation survives without activity
+SWEEP_INTERVAL = 60            # seconds between expiry sweeps
+SESSION_COOKIE = "bot_session"
+SESSION_BACKEND = "memory"     # memory (single process) | sqlite (shared by all workers on a host)
+SESSION_DB = os.path.join("data", "sessions.db")
+_SESSION_ID = re.compile(r"^[A-Za-z0-9_-]{16,64}$")
+
+# Everything the contact flow needs between messages; the message itself is written
+# straight to contacts.csv, so it is never held here
+SessionState = namedtuple("SessionState", ["step", "name", "email"])
+EMPTY_STATE = SessionState(None, None, None)
+
+
+def new_session_id():
+    return secrets.token_urlsafe(16)
+
+
+def valid_session_id(session_id):
+    return bool(session_id) and _SESSION_ID.match(session_id) is not None
+
+
+class MemorySessionStore:
+    """Per-process sessions in a dict with a TTL, swept by a background thread.
+
+    Expired entries are also treated as missing on read, so the sweep only bounds memory."""
+
+    def __init__(self, ttl=SESSION_TTL, sweep_interval=SWEEP_INTERVAL):
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._sessions = {}   # session_id -> (expires_at, SessionState)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="session-sweeper", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while not self._stop.wait(self.sweep_interval):
+            self.sweep()
+
+    def get(self, session_id):
+        entry = self._sessions.get(session_id)
+        if entry is None or entry[0] <= time.time():
+            return EMPTY_STATE
+        return entry[1]
+
+    def set(self, session_id, state):
+        with self._lock:
+            self._sessions[session_id] = (time.time() + self.ttl, state)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def sweep(self):
+        """Drop expired sessions; returns how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [sid for sid, (expires_at, _) in self._sessions.items() if expires_at <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        return len(expired)
+
+    def __len__(self):
+        return len(self._sessions)
+
+
+class SqliteSessionStore:
+    """Sessions in a local SQLite file (WAL), shared by every worker process on the host.
+
+    Reads ignore expired rows; expired rows are deleted by whichever worker writes first
+    after each sweep interval, so no extra process is needed."""
+
+    def __init__(self, path=SESSION_DB, ttl=SESSION_TTL, sweep_interval=SWEEP_INTERVAL):
+        self.path = path
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self._local = threading.local()
+        self._next_sweep = 0.0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                step TEXT,
+                name TEXT,
+                email TEXT,
+                expires_at REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
+        """)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    def get(self, session_id):
+        row = self._conn().execute(
+            "SELECT step, name, email FROM sessions WHERE session_id = ? AND expires_at > ?",
+            (session_id, time.time())).fetchone()
+        return EMPTY_STATE if row is None else SessionState(*row)
+
+    def set(self, session_id, state):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO sessions (session_id, step, name, email, expires_at) VALUES (?, ?, ?, ?, ?)",
+            (session_id, state.step, state.name, state.email, now + self.ttl))
+        if now >= self._next_sweep:
+            self._next_sweep = now + self.sweep_interval
+            self.sweep()
+
+    def delete(self, session_id):
+        self._conn().execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def sweep(self):
+        return self._conn().execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),)).rowcount
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def create_session_store(backend=None, ttl=SESSION_TTL):
+    """Store selected by SESSION_BACKEND (env overrides the default); sqlite uses SESSION_DB"""
+    backend = backend or os.getenv("SESSION_BACKEND", SESSION_BACKEND)
+    if backend == "sqlite":
+        return SqliteSessionStore(os.getenv("SESSION_DB", SESSION_DB), ttl).start()
+    if backend != "memory":
+        raise ValueError(f"Unknown session backend: {backend}")
+    return MemorySessionStore(ttl).start()
@@ -0,0 +1,215 @@
+"""
+ASGI entry point for the question generator.
+
+Serves the same routes as server.py, but the Gemini calls are awaited on the
+event loop (GenerativeModel.generate_content_async) instead of parking a thread
+for the whole multi-second generation, so one process can keep many generations
+in flight. Cache, question pool, attempt store, upstream budget and metrics are
+shared with server.py.
+
+    uvicorn asgi_server:app --port 5000 --workers 2
+"""
+import asyncio
+import logging
+import time
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import metrics
+import server
+from server import (
+    MAX_ATTEMPTS,
+    attempt_store,
+    upstream,
+    get_cache_key,
+    highlight_keyword,
+    template_question,
+)
+from upstream import UpstreamUnavailable
+
+
+# ⚡ Async generation paths (mirror generate_batch_questions & co. in server.py)
+async def generate_batch_questions_async(text, q_type, difficulty, num_questions):
+    prompt = server.build_batch_prompt(text, difficulty, num_questions)
+    try:
+        response = await upstream.generate_content_async(prompt, generation_config=server.batch_generation_config())
+        return server.parse_batch_output(response.text.strip(), num_questions)
+    except Exception as e:
+        logging.error(f"Error generating batch questions: {e}")
+        logging.info("Falling back to single question generation...")
+        return await generate_fallback_questions_async(text, q_type, difficulty, num_questions)
+
+
+async def generate_question_async(text, keyword, q_type, difficulty):
+    prompt = server.build_single_prompt(text, keyword, q_type, difficulty)
+    try:
+        response = await upstream.generate_content_async(prompt)
+        return server.parse_single_question(response.text.strip(), keyword)
+    except UpstreamUnavailable as e:
+        logging.warning(f"Skipping single question generation: {e}")
+        return None
+    except Exception as e:
+        logging.error(f"Error generating question: {e}")
+        return None
+
+
+async def retry_generate_question_async(text, keyword, q_type, difficulty, retries=2):
+    for attempt in range(retries):
+        result = await generate_question_async(text, keyword, q_type, difficulty)
+        if result:
+            return result
+        if not upstream.available():
+            break
+        logging.warning(f"Retry {attempt + 1} failed for {q_type} question with keyword '{keyword}'. Retrying...")
+    logging.error(f"Failed to generate {q_type} question after {retries} attempts.")
+    return None
+
+
+async def generate_fallback_questions_async(text, q_type, difficulty, num_questions):
+    keyword = highlight_keyword(text)
+    num_questions = min(num_questions, 10)
+    metrics.generation_path.set("fallback")
+
+    if not upstream.available():
+        return [template_question(text, keyword, i) for i in range(num_questions)]
+
+    tasks = [
+        asyncio.ensure_future(retry_generate_question_async(text, keyword, q_type, difficulty, retries=1))
+        for _ in range(num_questions)
+    ]
+    done, pending = await asyncio.wait(tasks, timeout=server.FALLBACK_DEADLINE)
+    for task in pending:
+        task.cancel()
+    if pending:
+        logging.warning(f"⏱️ {len(pending)} fallback questions missed the {server.FALLBACK_DEADLINE}s deadline")
+
+    questions = []
+    for i, task in enumerate(tasks):
+        question = task.result() if task in done and task.exception() is None else None
+        questions.append(question or template_question(text, keyword, i))
+    return questions
+
+
+# 🌐 Routes
+async def generate(request):
+    start_time = time.time()
+    data = await request.json()
+    text = data.get("text", "")
+    q_type = data.get("type", "MCQ")
+    difficulty = data.get("difficulty", "Easy")
+    num_questions = int(data.get("num_questions", 1))
+    user_id = data.get("user_id")
+
+    logging.info(f"🚀 Generating {num_questions} {q_type} questions with {difficulty} difficulty for topic: {text}")
+
+    cache_key = get_cache_key(text, q_type, difficulty)
+    if user_id:
+        fresh_questions = server.lookup_pool_questions(cache_key, user_id, num_questions, text)
+        if fresh_questions is not None:
+            return JSONResponse({"questions": fresh_questions, "cached": True})
+    else:
+        payload = server.lookup_cached_payload(cache_key, num_questions, text)
+        if payload is not None:
+            status, body, headers = payload.select(
+                request.headers.get("if-none-match"), request.headers.get("accept-encoding")
+            )
+            return Response(body, status_code=status, headers=headers)
+
+    try:
+        if num_questions > 1:
+            metrics.generation_path.set("batch")
+            results = await generate_batch_questions_async(text, q_type, difficulty, min(num_questions, 10))
+        else:
+            metrics.generation_path.set("single")
+            keyword = highlight_keyword(text)
+            single_result = await retry_generate_question_async(text, keyword, q_type, difficulty)
+            results = [single_result] if single_result else []
+
+        server.record_generated_questions(cache_key, text, q_type, difficulty, user_id, results)
+        return JSONResponse(server.build_generation_response(results, num_questions, start_time))
+
+    except Exception as e:
+        return JSONResponse(server.generation_error_response(e, start_time), status_code=500)
+
+
+async def health_check(request):
+    return JSONResponse(server.health_payload())
+
+
+async def prometheus_metrics(request):
+    return Response(metrics.render_latest(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+async def cache_stats(request):
+    return JSONResponse(server.cache_stats_payload())
+
+
+async def clear_cache(request):
+    old_size = server.clear_question_cache()
+    return JSONResponse({
+        "message": f"Cache cleared. Removed {old_size} entries.",
+        "cache_size": len(server.question_cache)
+    })
+
+
+async def get_attempt(request):
+    attempt = await run_in_threadpool(attempt_store.get, request.path_params["user_id"])
+    return JSONResponse({"attempt": attempt})
+
+
+async def increment_attempt(request):
+    incremented, attempt = await run_in_threadpool(
+        attempt_store.increment_if_below, request.path_params["user_id"], MAX_ATTEMPTS
+    )
+    if not incremented:
+        return JSONResponse({"error": "Max attempts reached"}, status_code=403)
+    return JSONResponse({"attempt": attempt})
+
+
+class RequestMetricsMiddleware:
+    """Per-endpoint latency labelled with the generation path, like the Flask before/after hooks"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        metrics.generation_path.set("none")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            endpoint = getattr(scope.get("endpoint"), "__name__", "unknown")
+            metrics.REQUEST_LATENCY.observe(
+                time.perf_counter() - start, endpoint=endpoint, path=metrics.generation_path.get()
+            )
+
+
+app = Starlette(
+    routes=[
+        Route("/api/generate", generate, methods=["POST"]),
+        Route("/api/health", health_check, methods=["GET"]),
+        Route("/metrics", prometheus_metrics, methods=["GET"]),
+        Route("/api/cache/stats", cache_stats, methods=["GET"]),
+        Route("/api/cache/clear", clear_cache, methods=["POST"]),
+        Route("/api/get_attempt/{user_id}", get_attempt, methods=["GET"]),
+        Route("/api/increment_attempt/{user_id}", increment_attempt, methods=["POST"]),
+    ],
+    middleware=[
+        Middleware(RequestMetricsMiddleware),
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"]),
+    ],
+)
+
+if __name__ == '__main__':
+    import uvicorn
+
+    logging.info("🚀 Starting AI Question Generator Server (ASGI mode)...")
+    uvicorn.run(app, port=5000)
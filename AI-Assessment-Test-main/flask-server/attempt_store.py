@@ -0,0 +1,106 @@
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import zlib
+
+# 🔒 Attempt counters with an atomic compare-and-increment, so concurrent requests
+# can't race past MAX_ATTEMPTS. The SQLite backend is shared by every gunicorn
+# worker on the box and survives restarts.
+
+LOCK_STRIPES = 64
+DEFAULT_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "attempts.db")
+
+
+class AttemptStore(ABC):
+    @abstractmethod
+    def get(self, user_id):
+        """Current attempt count for a user (0 if unknown)"""
+
+    @abstractmethod
+    def increment_if_below(self, user_id, limit):
+        """Atomically increment unless the count is already >= limit. Returns (incremented, count)."""
+
+    @abstractmethod
+    def reset(self, user_id):
+        """Forget the user's attempts"""
+
+
+class InMemoryAttemptStore(AttemptStore):
+    """Process-local store; a user's counter is guarded by one of LOCK_STRIPES locks"""
+
+    def __init__(self, stripes=LOCK_STRIPES):
+        self._counts = {}
+        self._locks = [threading.Lock() for _ in range(stripes)]
+
+    def _lock_for(self, user_id):
+        return self._locks[zlib.crc32(str(user_id).encode("utf-8")) % len(self._locks)]
+
+    def get(self, user_id):
+        return self._counts.get(user_id, 0)
+
+    def increment_if_below(self, user_id, limit):
+        with self._lock_for(user_id):
+            current = self._counts.get(user_id, 0)
+            if current >= limit:
+                return False, current
+            self._counts[user_id] = current + 1
+            return True, current + 1
+
+    def reset(self, user_id):
+        with self._lock_for(user_id):
+            self._counts.pop(user_id, None)
+
+
+class SQLiteAttemptStore(AttemptStore):
+    """Durable store shared across worker processes via a local SQLite file (WAL mode)"""
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("CREATE TABLE IF NOT EXISTS attempts (user_id TEXT PRIMARY KEY, count INTEGER NOT NULL)")
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            # isolation_level=None: we issue BEGIN IMMEDIATE ourselves to take the write lock up front
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            self._local.conn = conn
+        return conn
+
+    def get(self, user_id):
+        row = self._conn().execute("SELECT count FROM attempts WHERE user_id = ?", (user_id,)).fetchone()
+        return row[0] if row else 0
+
+    def increment_if_below(self, user_id, limit):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT count FROM attempts WHERE user_id = ?", (user_id,)).fetchone()
+            current = row[0] if row else 0
+            if current >= limit:
+                conn.execute("COMMIT")
+                return False, current
+            conn.execute(
+                "INSERT INTO attempts (user_id, count) VALUES (?, 1) "
+                "ON CONFLICT(user_id) DO UPDATE SET count = count + 1",
+                (user_id,)
+            )
+            conn.execute("COMMIT")
+            return True, current + 1
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def reset(self, user_id):
+        self._conn().execute("DELETE FROM attempts WHERE user_id = ?", (user_id,))
+
+
+def create_attempt_store():
+    """Pick the backend from ATTEMPT_STORE ("sqlite" by default, or "memory")"""
+    if os.getenv("ATTEMPT_STORE", "sqlite").lower() == "memory":
+        return InMemoryAttemptStore()
+    return SQLiteAttemptStore(os.getenv("ATTEMPT_DB_PATH", DEFAULT_DB_PATH))
@@ -0,0 +1,170 @@
+"""
+Benchmark: threaded Flask (server.py) vs ASGI (asgi_server.py) serving mode.
+
+Each mode is started in a subprocess with the Gemini model swapped for a fake
+that just waits --upstream-latency seconds, and with the upstream budget raised
+so the serving mode (not our quota protection) is what gets measured. Every
+request uses a unique topic so nothing is served from the cache.
+
+    python bench_async.py --requests 400 --concurrency 200 --upstream-latency 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+import concurrent.futures
+
+FLASK_PORT = 5100
+ASGI_PORT = 5101
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Stands in for GenerativeModel: same call shape, fixed latency, canned output"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.output = "Question: What is a benchmark?\nA) One\nB) Two\nC) Three\nD) Four\nAnswer: A"
+
+    def generate_content(self, prompt, **kwargs):
+        time.sleep(self.latency)
+        return _FakeResponse(self.output)
+
+    async def generate_content_async(self, prompt, **kwargs):
+        await asyncio.sleep(self.latency)
+        return _FakeResponse(self.output)
+
+
+def serve(mode, port, upstream_latency):
+    os.environ.setdefault("GENAI_API_KEY", "benchmark")
+    os.environ.setdefault("ATTEMPT_STORE", "memory")
+    import logging
+    import server
+
+    logging.disable(logging.INFO)
+    server.upstream.model = FakeModel(upstream_latency)
+    server.upstream.bucket.rate = server.upstream.bucket.capacity = 1e6
+    server.upstream.bucket._tokens = 1e6
+    server.upstream.concurrency.limit = server.upstream.concurrency.maximum = 100000
+
+    if mode == "flask":
+        server.app.run(port=port, threaded=True)
+    else:
+        import uvicorn
+        import asgi_server
+
+        uvicorn.run(asgi_server.app, port=port, log_level="warning")
+
+
+def _rss_and_threads(pid):
+    rss_kb, threads = 0, 0
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    rss_kb = int(line.split()[1])
+                elif line.startswith("Threads:"):
+                    threads = int(line.split()[1])
+    except OSError:
+        pass
+    return rss_kb, threads
+
+
+def _wait_until_up(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health", timeout=1)
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def _post(port, index):
+    body = json.dumps({"text": f"benchmark topic {index}", "num_questions": 1}).encode("utf-8")
+    req = urllib.request.Request(
+        f"http://127.0.0.1:{port}/api/generate", data=body, headers={"Content-Type": "application/json"}
+    )
+    start = time.perf_counter()
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        resp.read()
+    return time.perf_counter() - start
+
+
+def run_mode(mode, port, args):
+    proc = subprocess.Popen(
+        [sys.executable, __file__, "--serve", mode, "--port", str(port),
+         "--upstream-latency", str(args.upstream_latency)],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    try:
+        _wait_until_up(port)
+        peak_rss, peak_threads = _rss_and_threads(proc.pid)
+        latencies, errors = [], 0
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [pool.submit(_post, port, i) for i in range(args.requests)]
+            pending = set(futures)
+            while pending:
+                done, pending = concurrent.futures.wait(pending, timeout=0.25)
+                rss, threads = _rss_and_threads(proc.pid)
+                peak_rss, peak_threads = max(peak_rss, rss), max(peak_threads, threads)
+                for future in done:
+                    try:
+                        latencies.append(future.result())
+                    except Exception:
+                        errors += 1
+        elapsed = time.perf_counter() - start
+    finally:
+        proc.terminate()
+        proc.wait()
+
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else float("nan")
+    return {
+        "mode": mode,
+        "requests": args.requests,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_s": round(pct(0.50), 3),
+        "p95_s": round(pct(0.95), 3),
+        "p99_s": round(pct(0.99), 3),
+        "mean_s": round(statistics.mean(latencies), 3) if latencies else None,
+        "peak_rss_mb": round(peak_rss / 1024, 1),
+        "peak_threads": peak_threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--upstream-latency", type=float, default=2.0)
+    parser.add_argument("--serve", choices=["flask", "asgi"], help=argparse.SUPPRESS)
+    parser.add_argument("--port", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.port, args.upstream_latency)
+        return
+
+    results = [run_mode("flask", FLASK_PORT, args), run_mode("asgi", ASGI_PORT, args)]
+    print(f"{'mode':<6} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'rss MB':>8} {'threads':>8} {'errors':>7}")
+    for r in results:
+        print(f"{r['mode']:<6} {r['throughput_rps']:>8} {r['p50_s']:>8} {r['p95_s']:>8} {r['p99_s']:>8} "
+              f"{r['peak_rss_mb']:>8} {r['peak_threads']:>8} {r['errors']:>7}")
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import gzip
+import hashlib
+import json
+
+# 📦 Pre-encoded JSON responses for cache hits: serialized (and gzip-compressed)
+# once when first served, then handed out as bytes with a content-hash ETag.
+
+GZIP_MIN_BYTES = 512   # smaller bodies aren't worth compressing
+GZIP_LEVEL = 6
+
+
+def accepted_codings(accept_encoding):
+    """{coding: q} from an Accept-Encoding header value; malformed q-values count as 0"""
+    codings = {}
+    for part in (accept_encoding or "").lower().split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding] = q
+    return codings
+
+
+def accepts_gzip(accept_encoding):
+    """True if gzip is acceptable and not less preferred than the uncompressed body"""
+    codings = accepted_codings(accept_encoding)
+    wildcard = codings.get("*")
+    gzip_q = codings.get("gzip", codings.get("x-gzip", wildcard or 0.0))
+    identity_q = codings.get("identity", 1.0 if wildcard is None else wildcard)
+    return gzip_q > 0 and gzip_q >= identity_q
+
+
+class EncodedPayload:
+    def __init__(self, data):
+        self.body = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        digest = hashlib.blake2b(self.body, digest_size=16).hexdigest()
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gzip"'  # different bytes, so a different strong validator
+        self.gzipped = gzip.compress(self.body, GZIP_LEVEL) if len(self.body) >= GZIP_MIN_BYTES else None
+
+    def matches(self, if_none_match):
+        """True if an If-None-Match header value names either encoding of this payload"""
+        if not if_none_match:
+            return False
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        return "*" in tags or any(
+            tag in tags or f"W/{tag}" in tags for tag in (self.etag, self.gzip_etag)
+        )
+
+    def select(self, if_none_match=None, accept_encoding=None):
+        """Pick (status, body, headers) for a request: 304, gzip, or identity"""
+        use_gzip = self.gzipped is not None and accepts_gzip(accept_encoding)
+        headers = {
+            "ETag": self.gzip_etag if use_gzip else self.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+        }
+        if self.matches(if_none_match):
+            return 304, b"", headers
+        headers["Content-Type"] = "application/json"
+        if use_gzip:
+            headers["Content-Encoding"] = "gzip"
+            return 200, self.gzipped, headers
+        return 200, self.body, headers
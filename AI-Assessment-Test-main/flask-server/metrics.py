@@ -0,0 +1,165 @@
+import contextvars
+import threading
+import time
+
+# 📊 Minimal Prometheus instrumentation (text exposition format 0.0.4) for the
+# question generator. Kept dependency-free on purpose: a handful of counters and
+# histograms is all we need to capacity-plan the Gemini quota.
+
+PROCESS_START = time.time()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60)
+
+# Which path served the current request: cache, pool, batch, fallback, single, error, none
+generation_path = contextvars.ContextVar("generation_path", default="none")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        lines.extend(self._render_samples(items))
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _render_samples(self, items):
+        lines = []
+        for key, (bucket_counts, total, count) in items:
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', bound))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, ('le', '+Inf'))} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, value_fn):
+        super().__init__(name, documentation)
+        self.value_fn = value_fn
+
+    def _render_samples(self, items):
+        return [f"{self.name} {self.value_fn()}"]
+
+
+REGISTRY = []
+
+REQUEST_LATENCY = Histogram(
+    "question_generator_request_seconds",
+    "HTTP request latency by endpoint and generation path (cache, pool, batch, fallback, single, error, none).",
+    ("endpoint", "path"),
+)
+UPSTREAM_LATENCY = Histogram(
+    "question_generator_upstream_call_seconds",
+    "Latency of individual Gemini calls by outcome (success, error, throttled).",
+    ("outcome",),
+)
+UPSTREAM_REJECTED = Counter(
+    "question_generator_upstream_rejected_total",
+    "Gemini calls skipped by the upstream client (circuit open, rate or concurrency limit).",
+    ("reason",),
+)
+PARSE_RESULTS = Counter(
+    "question_generator_parse_total",
+    "Batch output parse attempts by parser (structured, fallback) and result (success, empty).",
+    ("parser", "result"),
+)
+LLM_TOKENS = Counter(
+    "question_generator_llm_tokens_total",
+    "LLM tokens by direction (input, output); estimated at 4 chars/token when the SDK reports no usage.",
+    ("direction", "source"),
+)
+UPTIME = Gauge(
+    "question_generator_uptime_seconds",
+    "Seconds since this worker process started.",
+    lambda: round(time.time() - PROCESS_START, 3),
+)
+
+
+def uptime():
+    return time.time() - PROCESS_START
+
+
+def record_tokens(prompt, response):
+    """Count input/output tokens from usage metadata, or estimate them from text length"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is not None and getattr(usage, "prompt_token_count", None) is not None:
+        LLM_TOKENS.inc(usage.prompt_token_count, direction="input", source="reported")
+        LLM_TOKENS.inc(getattr(usage, "candidates_token_count", 0) or 0, direction="output", source="reported")
+        return
+    try:
+        output_text = response.text
+    except Exception:
+        output_text = ""
+    LLM_TOKENS.inc(len(str(prompt)) // 4, direction="input", source="estimated")
+    LLM_TOKENS.inc(len(output_text) // 4, direction="output", source="estimated")
+
+
+def render_latest():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
@@ -0,0 +1,198 @@
+import math
+import threading
+import wave
+
+import numpy as np
+
+# === SETTINGS ===
+SAMPLE_RATE = 16000
+BLOCK_SIZE = 1024          # samples per audio callback (~64 ms at 16 kHz)
+RING_SECONDS = 5           # raw audio kept for inspection
+SOUND_THRESHOLD = 0.02     # block RMS above this counts as sound
+SOUND_WINDOW = 1.0         # seconds covered by rolling RMS / "sound in the last window"
+
+
+class AudioMonitor:
+    """Continuous, non-blocking microphone monitor.
+
+    An input-stream callback feeds a ring buffer and keeps per-block energy, so the
+    video loop can ask "was there sound in the last window?" or "what is the rolling
+    RMS?" in O(1) without ever waiting on the microphone. Everything runs off feed(),
+    so it can be driven from a WAV file instead of a live device (see WavReplay)."""
+
+    def __init__(self, samplerate=SAMPLE_RATE, blocksize=BLOCK_SIZE, ring_seconds=RING_SECONDS,
+                 threshold=SOUND_THRESHOLD, window=SOUND_WINDOW):
+        self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.threshold = threshold
+        self.window = window
+        self._ring = np.zeros(int(samplerate * ring_seconds), dtype=np.float32)
+        self._write_pos = 0
+        self._samples_seen = 0
+        # Per-block (sum of squares, sample count) over the rolling window
+        self._window_blocks = max(1, math.ceil(window * samplerate / blocksize))
+        self._block_energy = np.zeros(self._window_blocks)
+        self._block_samples = np.zeros(self._window_blocks)
+        self._block_index = 0
+        self._window_energy = 0.0
+        self._window_samples = 0.0
+        self._last_loud_time = None
+        self._lock = threading.Lock()
+        self._stream = None
+
+    # --- live microphone ---
+    def start(self):
+        import sounddevice as sd
+
+        self._stream = sd.InputStream(samplerate=self.samplerate, blocksize=self.blocksize,
+                                      channels=1, dtype="float32", callback=self._callback)
+        self._stream.start()
+        return self
+
+    def stop(self):
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+
+    def _callback(self, indata, frames, time_info, status):
+        self.feed(indata[:, 0])
+
+    # --- shared ingest path ---
+    def feed(self, samples):
+        """Append one block of mono float samples in [-1, 1]"""
+        samples = np.asarray(samples, dtype=np.float32)
+        n = len(samples)
+        if n == 0:
+            return
+        energy = float(np.dot(samples, samples))
+
+        with self._lock:
+            # Ring buffer write (wraps around)
+            size = len(self._ring)
+            if n >= size:
+                self._ring[:] = samples[-size:]
+                self._write_pos = 0
+            else:
+                end = self._write_pos + n
+                if end <= size:
+                    self._ring[self._write_pos:end] = samples
+                else:
+                    split = size - self._write_pos
+                    self._ring[self._write_pos:] = samples[:split]
+                    self._ring[:n - split] = samples[split:]
+                self._write_pos = end % size
+            self._samples_seen += n
+
+            # Rolling window: replace the oldest block's contribution with this one
+            i = self._block_index
+            self._window_energy += energy - self._block_energy[i]
+            self._window_samples += n - self._block_samples[i]
+            self._block_energy[i] = energy
+            self._block_samples[i] = n
+            self._block_index = (i + 1) % self._window_blocks
+
+            if math.sqrt(energy / n) > self.threshold:
+                self._last_loud_time = self._samples_seen / self.samplerate
+
+    # --- O(1) queries for the video loop ---
+    @property
+    def stream_time(self):
+        """Seconds of audio received so far (the monitor's clock)"""
+        return self._samples_seen / self.samplerate
+
+    def rms(self):
+        """RMS over the rolling window"""
+        with self._lock:
+            if self._window_samples <= 0:
+                return 0.0
+            return math.sqrt(max(0.0, self._window_energy) / self._window_samples)
+
+    def sound_in_last(self, seconds=None):
+        """True if any block louder than the threshold ended within the last `seconds` of audio"""
+        seconds = self.window if seconds is None else seconds
+        with self._lock:
+            if self._last_loud_time is None:
+                return False
+            return self._samples_seen / self.samplerate - self._last_loud_time <= seconds
+
+    def recent_samples(self, seconds):
+        """Copy of the last `seconds` of raw audio from the ring buffer"""
+        with self._lock:
+            n = min(int(seconds * self.samplerate), len(self._ring), self._samples_seen)
+            start = (self._write_pos - n) % len(self._ring)
+            if start + n <= len(self._ring):
+                return self._ring[start:start + n].copy()
+            return np.concatenate((self._ring[start:], self._ring[:self._write_pos]))
+
+
+class WavReplay:
+    """Feeds a WAV file into an AudioMonitor block by block, in place of a microphone.
+
+    8/16/24/32-bit PCM at any sample rate; other rates are linearly resampled to the
+    monitor's rate, which is plenty for energy thresholds."""
+
+    def __init__(self, monitor, path):
+        self.monitor = monitor
+        self._wav = wave.open(path, "rb")
+        self.channels = self._wav.getnchannels()
+        self.sampwidth = self._wav.getsampwidth()
+        self.samplerate = self._wav.getframerate()
+        if self.sampwidth not in (1, 2, 3, 4):
+            self._wav.close()
+            raise ValueError(f"{path}: unsupported sample width {self.sampwidth} bytes")
+        self._step = self.samplerate / float(monitor.samplerate)  # source samples per output sample
+        self._read_frames = max(1, math.ceil(monitor.blocksize * self._step))
+        self._pos = 0.0                               # next output position, in source samples
+        self._tail = np.zeros(0, dtype=np.float32)    # last source sample of the previous block
+        self.finished = False
+
+    def _decode(self, raw):
+        if self.sampwidth == 1:
+            return (np.frombuffer(raw, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+        if self.sampwidth == 3:
+            # Little-endian 24-bit: shift into the top of an int32 so the sign comes along
+            padded = np.zeros((len(raw) // 3, 4), dtype=np.uint8)
+            padded[:, 1:] = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+            return padded.view("<i4").ravel().astype(np.float32) / float(2 ** 31)
+        dtype = "<i2" if self.sampwidth == 2 else "<i4"
+        return np.frombuffer(raw, dtype=dtype).astype(np.float32) / float(2 ** (8 * self.sampwidth - 1))
+
+    def _resample(self, samples):
+        if self._step == 1.0:
+            return samples
+        source = np.concatenate((self._tail, samples))
+        last = len(source) - 1
+        count = int((last - self._pos) // self._step) + 1 if last >= self._pos else 0
+        positions = self._pos + np.arange(count) * self._step
+        resampled = np.interp(positions, np.arange(len(source)), source).astype(np.float32)
+        # Carry the last source sample so interpolation is continuous across blocks
+        self._pos += count * self._step - last
+        self._tail = source[-1:]
+        return resampled
+
+    def _read_block(self):
+        raw = self._wav.readframes(self._read_frames)
+        if not raw:
+            self.finished = True
+            return None
+        samples = self._decode(raw)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        return self._resample(samples)
+
+    def advance_to(self, seconds):
+        """Feed blocks until the monitor's clock reaches `seconds` (e.g. the current video timestamp)"""
+        while not self.finished and self.monitor.stream_time < seconds:
+            block = self._read_block()
+            if block is not None:
+                self.monitor.feed(block)
+
+    def replay_all(self):
+        while not self.finished:
+            block = self._read_block()
+            if block is not None:
+                self.monitor.feed(block)
+
+    def close(self):
+        self._wav.close()
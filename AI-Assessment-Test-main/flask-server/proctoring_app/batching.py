@@ -0,0 +1,110 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+# === SETTINGS ===
+MAX_BATCH_SIZE = 8      # frames per forward pass
+MAX_BATCH_WAIT = 0.025  # seconds the first frame of a batch may wait for company
+STATS_WINDOW = 1000     # recent items / batches kept for percentile metrics
+
+
+class DynamicBatcher:
+    """Collects items from many callers into batches for one batched call.
+
+    A batch is dispatched as soon as it holds max_batch_size items, or max_wait after
+    its first item arrived, whichever comes first. submit() returns a Future that
+    resolves to that item's entry in the list returned by batch_fn."""
+
+    def __init__(self, batch_fn, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_BATCH_WAIT, name="batcher"):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._pending = deque()  # (item, future, submitted_at)
+        self._running = True
+        self._queue_delays = deque(maxlen=STATS_WINDOW)
+        self._batch_sizes = deque(maxlen=STATS_WINDOW)
+        self._batch_times = deque(maxlen=STATS_WINDOW)
+        self._started = time.monotonic()
+        self.items = 0
+        self.batches = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        with self._cond:
+            if not self._running:
+                raise RuntimeError("batcher is stopped")
+            self._pending.append((item, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        self._thread.join(timeout=2)
+
+    def _next_batch(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending or not self._running)
+            if not self._pending:
+                return None
+            deadline = self._pending[0][2] + self.max_wait
+            while len(self._pending) < self.max_batch_size and self._running:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            count = min(len(self._pending), self.max_batch_size)
+            return [self._pending.popleft() for _ in range(count)]
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            started = time.monotonic()
+            try:
+                outputs = self.batch_fn([item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            finished = time.monotonic()
+
+            with self._cond:
+                self._queue_delays.extend(started - submitted_at for _, _, submitted_at in batch)
+                self._batch_sizes.append(len(batch))
+                self._batch_times.append(finished - started)
+                self.items += len(batch)
+                self.batches += 1
+            for (_, future, _), output in zip(batch, outputs):
+                future.set_result(output)
+
+    def stats(self):
+        """Throughput, batch size and queueing-delay metrics over the recent window"""
+        with self._cond:
+            sizes = np.array(self._batch_sizes)
+            times = np.array(self._batch_times)
+            delays = np.array(self._queue_delays) * 1000
+        busy = float(times.sum())
+        stats = {
+            "items": self.items,
+            "batches": self.batches,
+            "mean_batch_size": float(sizes.mean()) if sizes.size else 0.0,
+            "batch_ms_mean": float(times.mean() * 1000) if times.size else 0.0,
+            "items_per_busy_second": float(sizes.sum() / busy) if busy else 0.0,
+            "items_per_second": self.items / max(time.monotonic() - self._started, 1e-9),
+            "queue_ms_p50": 0.0,
+            "queue_ms_p95": 0.0,
+            "queue_ms_p99": 0.0,
+        }
+        if delays.size:
+            stats["queue_ms_p50"], stats["queue_ms_p95"], stats["queue_ms_p99"] = \
+                (float(v) for v in np.percentile(delays, [50, 95, 99]))
+        return stats
@@ -0,0 +1,86 @@
+# bench_pipeline.py
+"""
+Offline benchmark for the proctoring pipeline.
+
+Replays recorded videos (optionally with a WAV track) through camera.generate_frames
+as fast as possible and reports FPS plus per-stage latency percentiles (face detection,
+landmarks, head pose, identity, YOLO, audio, events, overlay drawing, encoding).
+
+    python bench_pipeline.py exam1.mp4 exam2.mp4 --wav exam1.wav --max-frames 600
+    python bench_pipeline.py exam1.mp4 --json results.json                 # save a baseline
+    python bench_pipeline.py exam1.mp4 --baseline results.json --tolerance 0.15
+
+With --baseline the script exits non-zero if FPS dropped, or p95 frame latency grew, by
+more than --tolerance relative to the saved run for the same video.
+"""
+import argparse
+import itertools
+import json
+import sys
+
+from camera import generate_frames
+from profiling import StageTimer, format_report
+
+
+def run_video(path, wav, max_frames, warmup):
+    # Warm-up frames (model/JIT/cache start-up) are dropped by the timer once each has
+    # completed, so none of their time leaks into the measured frames. Replays record
+    # no events (camera.proctor_frames uses a NullEventSink), so production logs stay clean.
+    timings = StageTimer(warmup_frames=warmup)
+    frames = generate_frames(path, audio_path=wav, realtime=False, timings=timings)
+    try:
+        for _ in itertools.islice(frames, warmup + max_frames):
+            pass
+    finally:
+        frames.close()
+    return timings.report()
+
+
+def compare(name, report, baseline, tolerance):
+    """Regression messages for one video; empty when within tolerance"""
+    failures = []
+    if report["fps"] < baseline["fps"] * (1 - tolerance):
+        failures.append(f"{name}: FPS {report['fps']:.1f} < baseline {baseline['fps']:.1f}")
+    current_p95 = report["stages"].get("frame", {}).get("p95")
+    baseline_p95 = baseline["stages"].get("frame", {}).get("p95")
+    if current_p95 and baseline_p95 and current_p95 > baseline_p95 * (1 + tolerance):
+        failures.append(f"{name}: p95 frame latency {current_p95:.1f} ms > baseline {baseline_p95:.1f} ms")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay benchmark for the proctoring pipeline")
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--wav", help="audio track replayed alongside the first video")
+    parser.add_argument("--max-frames", type=int, default=600)
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.10)
+    args = parser.parse_args()
+
+    results = {}
+    for i, video in enumerate(args.videos):
+        report = run_video(video, args.wav if i == 0 else None, args.max_frames, args.warmup)
+        results[video] = report
+        print(format_report(report, title=f"== {video}"))
+        print()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = [message for video, report in results.items() if video in baseline
+                    for message in compare(video, report, baseline[video], args.tolerance)]
+        for message in failures:
+            print(f"REGRESSION {message}")
+        if failures:
+            sys.exit(1)
+        print("No regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
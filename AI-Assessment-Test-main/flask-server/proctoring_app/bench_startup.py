@@ -0,0 +1,80 @@
+# bench_startup.py
+"""
+Startup / footprint benchmark for the detection models.
+
+Each backend is measured in a fresh interpreter: time to import detection.py, to load
+the dlib models, to load YOLO, the first and mean inference latency on a dummy frame,
+and peak RSS.
+
+    python bench_startup.py --backends torch opencv onnxruntime --runs 20
+    YOLO_WEIGHTS=models/yolov5s.onnx python bench_startup.py --backends opencv onnxruntime
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+CHILD = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import numpy as np
+import detection
+t_import = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+detection.get_face_detector()
+try:
+    detection.get_shape_predictor()
+except FileNotFoundError:
+    pass
+t_dlib = time.perf_counter() - t0
+
+t0 = time.perf_counter()
+yolo = detection.get_yolo()  # YOLO_BACKEND is set in our env; same cache entry detect_mobile_objects uses
+t_load = time.perf_counter() - t0
+
+frame = np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8)
+t0 = time.perf_counter()
+detection.detect_mobile_objects(frame)
+t_first = time.perf_counter() - t0
+
+runs = int(sys.argv[1])
+t0 = time.perf_counter()
+for _ in range(runs):
+    detection.detect_mobile_objects(frame)
+t_mean = (time.perf_counter() - t0) / max(runs, 1)
+
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({"import": t_import, "dlib": t_dlib, "yolo_load": t_load, "first": t_first,
+                  "mean": t_mean, "rss_mb": rss / 1024 if sys.platform != "darwin" else rss / 1e6}))
+"""
+
+
+def measure(backend, runs):
+    env = dict(os.environ, YOLO_BACKEND=backend)
+    proc = subprocess.run([sys.executable, "-c", CHILD, str(runs)], capture_output=True, text=True,
+                          env=env, cwd=os.path.dirname(os.path.abspath(__file__)))
+    if proc.returncode != 0:
+        return {"error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Model startup-time and footprint benchmark")
+    parser.add_argument("--backends", nargs="+", default=["torch", "opencv", "onnxruntime"])
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'backend':<12} {'import s':>9} {'dlib s':>7} {'yolo s':>7} {'first ms':>9} {'mean ms':>8} {'RSS MB':>7}")
+    for backend in args.backends:
+        r = measure(backend, args.runs)
+        if "error" in r:
+            print(f"{backend:<12} error: {r['error']}")
+            continue
+        print(f"{backend:<12} {r['import']:>9.2f} {r['dlib']:>7.2f} {r['yolo_load']:>7.2f} "
+              f"{r['first'] * 1000:>9.1f} {r['mean'] * 1000:>8.1f} {r['rss_mb']:>7.0f}")
+
+
+if __name__ == "__main__":
+    main()
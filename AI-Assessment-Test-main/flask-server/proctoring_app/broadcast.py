@@ -0,0 +1,153 @@
+import threading
+import time
+
+import cv2
+
+# === SETTINGS ===
+# Stream profiles from best to cheapest: (JPEG quality, resolution scale, max FPS)
+STREAM_PROFILES = [
+    (85, 1.0, 30),
+    (75, 1.0, 20),
+    (65, 0.75, 15),
+    (55, 0.5, 10),
+    (45, 0.5, 5),
+]
+ADAPT_INTERVAL = 2.0     # seconds between quality decisions
+DEGRADE_BELOW = 0.7      # slowest viewer received less than this share of frames -> step down
+UPGRADE_ABOVE = 0.95     # every viewer received at least this share -> step back up
+VIEWER_WAIT = 1.0        # seconds a viewer waits for a frame before re-checking the broadcaster
+
+
+class _Viewer:
+    def __init__(self):
+        self.last_frame_id = 0
+        self.delivered = 0   # frames handed to this client in the current adapt window
+
+
+class MJPEGBroadcaster:
+    """Runs one capture/analysis pipeline and fans its JPEG frames out to every viewer.
+
+    Each frame is encoded once, at the current profile, and shared by all clients.
+    Viewers always get the newest frame: a client that drains slowly simply skips
+    frames. The share of frames the slowest client actually received drives the
+    profile (quality, then resolution, then FPS) down and back up. With no viewers
+    the pipeline keeps proctoring but nothing is encoded."""
+
+    def __init__(self, frame_source, profiles=STREAM_PROFILES, adapt_interval=ADAPT_INTERVAL):
+        self.frame_source = frame_source   # callable returning an iterator of annotated BGR frames
+        self.profiles = profiles
+        self.adapt_interval = adapt_interval
+        self.level = 0
+        self._cond = threading.Condition()
+        self._viewers = set()
+        self._chunk = None
+        self._frame_id = 0
+        self._last_encode = 0.0
+        self._window_start = time.monotonic()
+        self._window_published = 0
+        self._thread = None
+        self.running = False
+        self.stats = {"frames": 0, "encoded": 0, "skipped_no_viewers": 0, "skipped_fps": 0,
+                      "bytes": 0, "profile_changes": 0}
+
+    def start(self):
+        with self._cond:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self.running = True
+            self._thread = threading.Thread(target=self._run, name="mjpeg-broadcaster", daemon=True)
+            self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            for frame in self.frame_source():
+                self._publish(frame)
+        finally:
+            with self._cond:
+                self.running = False
+                self._cond.notify_all()
+
+    def _publish(self, frame):
+        self.stats["frames"] += 1
+        with self._cond:
+            if not self._viewers:
+                self.stats["skipped_no_viewers"] += 1
+                return
+            self._adapt()
+            quality, scale, max_fps = self.profiles[self.level]
+
+        now = time.monotonic()
+        if now - self._last_encode < 1.0 / max_fps:
+            self.stats["skipped_fps"] += 1
+            return
+        self._last_encode = now
+
+        if scale < 1.0:
+            frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        ret, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ret:
+            return
+        data = buffer.tobytes()
+        chunk = (b'--frame\r\n'
+                 b'Content-Type: image/jpeg\r\n\r\n' + data + b'\r\n')
+
+        with self._cond:
+            self._chunk = chunk
+            self._frame_id += 1
+            self._window_published += 1
+            self.stats["encoded"] += 1
+            self.stats["bytes"] += len(data)
+            self._cond.notify_all()
+
+    def _adapt(self):
+        """Pick the profile from how much of the last window the slowest viewer received (lock held)"""
+        now = time.monotonic()
+        if now - self._window_start < self.adapt_interval:
+            return
+        if self._window_published:
+            slowest = min(viewer.delivered for viewer in self._viewers) / self._window_published
+            if slowest < DEGRADE_BELOW and self.level < len(self.profiles) - 1:
+                self.level += 1
+                self.stats["profile_changes"] += 1
+            elif slowest >= UPGRADE_ABOVE and self.level > 0:
+                self.level -= 1
+                self.stats["profile_changes"] += 1
+        for viewer in self._viewers:
+            viewer.delivered = 0
+        self._window_published = 0
+        self._window_start = now
+
+    def subscribe(self):
+        """Generator of multipart MJPEG chunks for one client"""
+        viewer = _Viewer()
+        with self._cond:
+            viewer.last_frame_id = self._frame_id
+            self._viewers.add(viewer)
+            self._window_start = time.monotonic()  # don't judge a window the new viewer only saw part of
+            self._window_published = 0
+            for other in self._viewers:
+                other.delivered = 0
+        self.start()
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._frame_id != viewer.last_frame_id or not self.running,
+                                        timeout=VIEWER_WAIT)
+                    if not self.running:
+                        return
+                    if self._frame_id == viewer.last_frame_id:
+                        continue
+                    viewer.last_frame_id = self._frame_id
+                    viewer.delivered += 1
+                    chunk = self._chunk
+                yield chunk  # blocks while this client's socket is full; others are unaffected
+        finally:
+            with self._cond:
+                self._viewers.discard(viewer)
+
+    def status(self):
+        with self._cond:
+            quality, scale, max_fps = self.profiles[self.level]
+            return dict(self.stats, viewers=len(self._viewers), running=self.running,
+                        profile={"level": self.level, "quality": quality, "scale": scale, "max_fps": max_fps})
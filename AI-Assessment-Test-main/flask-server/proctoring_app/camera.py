@@ -1,32 +1,44 @@
+import atexit
 import cv2
 import time
 import os
 import numpy as np
-import threading
-from datetime import datetime
-from detection import detect_faces_dlib, detect_eyes_dlib, get_head_pose, detect_multiple_faces
-from identity import get_face_encoding, compare_face_encoding
+from detection import analyze_frame
+from tracking import FaceTracker, DETECT_EVERY, DETECT_SCALE
+from identity import EmbeddingGallery, IdentityVerifier, EMBEDDING_STORE
 from playsound import playsound
-from detection import detect_mobile_objects
-from detection import detect_audio
-import csv
-
-SNAPSHOT_LOG = "snapshot_log.csv"
-
-# Create CSV log with headers if not exists
-if not os.path.exists(SNAPSHOT_LOG):
-    with open(SNAPSHOT_LOG, mode='w', newline='') as log_file:
-        log_writer = csv.writer(log_file)
-        log_writer.writerow(["Event", "Timestamp", "Filename", "Details"])
+from object_worker import ObjectDetectionWorker, YOLO_RATE_HZ
+from audio_monitor import AudioMonitor, WavReplay, SOUND_WINDOW
+from profiling import NullTimer
+from event_writer import EventWriter, NullEventSink
+from snapshot_store import SnapshotStore
+from event_store import EventStore, EVENT_DB
+from events import EventEngine, AlertPlayer, EVENT_RULES, ONSET, CLEARED
 
 # === SETTINGS ===
 ALERT_SOUND = "alert.wav"
 SNAPSHOT_DIR = "snapshots"
+SNAPSHOT_LOG = "snapshot_log.csv"
 LOOK_AWAY_THRESHOLD = 5  # seconds
 ABSENCE_THRESHOLD = 10   # seconds
+FACE_TRACKING = os.getenv("PROCTOR_FACE_TRACKING", "0") == "1"  # detect-then-track (tracking.py); off = full-frame detection every frame
+CANDIDATE_NAME = os.getenv("PROCTOR_CANDIDATE")  # enrolled name to verify against; unset = first face seen
+SESSION_ID = os.getenv("PROCTOR_SESSION", "local")  # key for this exam in the event store
+CAMERA_EVENT_RULES = {
+    "no_face": dict(EVENT_RULES["no_face"], hold=ABSENCE_THRESHOLD),
+    "looking_away": dict(EVENT_RULES["looking_away"], hold=LOOK_AWAY_THRESHOLD),
+}
+
+# Enrolled embeddings are loaded once at startup (see `python identity.py enroll`)
+known_gallery = EmbeddingGallery.load(EMBEDDING_STORE)
 
-if not os.path.exists(SNAPSHOT_DIR):
-    os.makedirs(SNAPSHOT_DIR)
+# JPEG encoding and log appends run on a background thread (see event_writer.py);
+# snapshots are deduplicated and quota-limited per session (snapshot_store.py), and
+# every logged row also lands in the indexed event store for review queries
+event_store = EventStore(os.getenv("EVENT_DB", EVENT_DB))
+snapshot_store = SnapshotStore(SNAPSHOT_DIR, SESSION_ID)
+event_writer = EventWriter(SNAPSHOT_LOG, snapshot_store, store=event_store, session_id=SESSION_ID).start()
+atexit.register(event_writer.stop)
 
 def sound_alert():
     try:
@@ -34,129 +46,211 @@ def sound_alert():
     except:
         print("[Sound Error] Check alert.wav and audio setup")
 
-def take_snapshot(frame, event, details=""):
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    filename = f"{SNAPSHOT_DIR}/{event}_{timestamp}.jpg"
-    cv2.imwrite(filename, frame)
-    print(f"[Snapshot] {event} saved at {filename}")
-
-    # Log event to CSV
-    with open(SNAPSHOT_LOG, mode='a', newline='') as log_file:
-        log_writer = csv.writer(log_file)
-        log_writer.writerow([event, timestamp, filename, details])
-
-def log_event(event, details=""):
-    timestamp = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    with open(SNAPSHOT_LOG, mode='a', newline='') as log_file:
-        log_writer = csv.writer(log_file)
-        log_writer.writerow([event, timestamp, "", details])
-
-def generate_frames():
-    cap = cv2.VideoCapture(0)
-    known_face = None
-    absence_start_time = None
-    look_away_start_time = None
-    last_snapshot_time = time.time()
-
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-
-        faces = detect_faces_dlib(frame)
-        face_count = detect_multiple_faces(frame)
-        current_time = time.time()
-
-        status_msgs = ["✅ Face Detected"]
-        color = (0, 255, 0)
-
-        # Identity verification
-        if face_count == 1:
-            if known_face is None:
-                known_face = get_face_encoding(frame)
-            elif not compare_face_encoding(known_face, frame):
-                status_msgs.append("🚫 Different Face Detected")
-                color = (0, 0, 255)
-                threading.Thread(target=sound_alert).start()
-                take_snapshot(frame, "face_swap", "Identity mismatch detected")
-
-        # Absence detection
-        if face_count == 0:
-            if absence_start_time is None:
-                absence_start_time = current_time
-            elif current_time - absence_start_time >= ABSENCE_THRESHOLD:
-                status_msgs.append("🚫 No Face Detected")
-                color = (0, 0, 255)
-                threading.Thread(target=sound_alert).start()
-                take_snapshot(frame, "no_face", "No face detected for 10 seconds")
+# All alert sounds go through one player thread with a small bounded queue (see events.py)
+alert_player = AlertPlayer(sound_alert).start()
+
+def take_snapshot(frame, event, details="", sink=None, ts=None):
+    (sink or event_writer).snapshot(frame, event, details, ts)
+
+def log_event(event, details="", sink=None, ts=None):
+    (sink or event_writer).log(event, details, ts)
+
+def handle_event(events, event, condition, now, frame, details="", sink=None):
+    """Feed one condition to the event engine; alert + snapshot on onset, log when the incident clears"""
+    transition = events.update(event, condition, now)
+    if transition == ONSET:
+        alert_player.alert()
+        take_snapshot(frame, event, details, sink, now)
+    elif transition == CLEARED:
+        log_event(f"{event}_cleared", f"Lasted {events.duration(event, now):.1f} seconds", sink, now)
+    return events.is_active(event)
+
+def proctor_frames(source=0, audio_path=None, realtime=True, timings=None, sink=None):
+    """Capture + analysis loop; yields each annotated BGR frame (encoding is up to the caller).
+
+    `source` is a camera index or a video file. For a file (replay mode) the clock is the
+    video's own timeline, YOLO runs inline at YOLO_RATE_HZ of video time and audio comes
+    from `audio_path` (WAV) if given, so a recording replays deterministically and, with
+    realtime=False, as fast as the pipeline allows. Pass a profiling.StageTimer as
+    `timings` to record per-stage durations.
+
+    Events go to `sink` (an EventWriter). It defaults to the app's event_writer for a
+    live camera and to a NullEventSink for replays, so replaying or benchmarking a
+    recording never writes into the exam's snapshot log, event store or snapshots;
+    pass a dedicated EventWriter to keep a replay's events (stamped with video time)."""
+    timings = timings or NullTimer()
+    replay = not isinstance(source, int)
+    if sink is None:
+        sink = NullEventSink() if replay else event_writer
+    cap = cv2.VideoCapture(source)
+    video_fps = (cap.get(cv2.CAP_PROP_FPS) or 30.0) if replay else None
+    frame_index = 0
+    wall_start = start_time = time.time()
+
+    identity_verifier = IdentityVerifier(known_gallery, CANDIDATE_NAME)
+    events = EventEngine(CAMERA_EVENT_RULES)
+    last_snapshot_time = start_time
+    face_tracker = FaceTracker(DETECT_EVERY, DETECT_SCALE) if FACE_TRACKING else None
+    object_worker = ObjectDetectionWorker()
+    last_yolo_time = None
+    audio_monitor = AudioMonitor()
+    audio_replay = None
+
+    try:
+        # Inside the try so the capture and the YOLO worker are released if the WAV can't be opened
+        if replay:
+            if audio_path:
+                audio_replay = WavReplay(audio_monitor, audio_path)
         else:
-            absence_start_time = None
-
-        # Multiple faces
-        if face_count > 1:
-            status_msgs.append("👥 Multiple Faces Detected")
-            color = (0, 0, 255)
-            threading.Thread(target=sound_alert).start()
-            take_snapshot(frame, "multiple_faces")
-            log_event("multiple_faces", "More than one face in frame")
-
-        # Head Pose (Gaze)
-        if face_count == 1:
-            direction = get_head_pose(frame, faces[0])
-            if direction != "Looking Forward":
-                if look_away_start_time is None:
-                    look_away_start_time = current_time
-                elif current_time - look_away_start_time >= LOOK_AWAY_THRESHOLD:
+            object_worker.start()
+            try:
+                audio_monitor.start()
+            except Exception as e:
+                print(f"Audio detection error: {e}")
+
+        while True:
+            timings.start_frame()
+            with timings.stage("capture"):
+                ret, frame = cap.read()
+            if not ret:
+                break
+
+            if replay:
+                video_time = frame_index / video_fps
+                current_time = start_time + video_time
+                frame_index += 1
+                if realtime:
+                    delay = wall_start + video_time - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+            else:
+                current_time = time.time()
+
+            # One grayscale conversion, one face detection and one landmark pass per face, shared below
+            with timings.stage("face_detection"):
+                analysis = analyze_frame(frame, tracker=face_tracker)
+                faces = analysis.faces
+                face_count = analysis.face_count
+            with timings.stage("landmarks"):
+                for i in range(face_count):
+                    analysis.landmarks(i)
+
+            with timings.stage("yolo"):
+                if not replay:
+                    # Hand the clean frame to the YOLO worker; it runs at its own rate on the newest frame
+                    object_worker.submit(frame)
+                elif last_yolo_time is None or current_time - last_yolo_time >= 1.0 / YOLO_RATE_HZ:
+                    object_worker.detect_now(frame, current_time)
+                    last_yolo_time = current_time
+                detected_objects, _ = object_worker.latest(current_time if replay else None)
+
+            status_msgs = ["✅ Face Detected"]
+            color = (0, 255, 0)
+
+            # Each check feeds the event engine; it decides when an incident starts, alerts once and clears
+
+            # Identity verification: reuses the face box, re-encodes every few frames or when tracking restarts
+            with timings.stage("identity"):
+                mismatch = False
+                if face_count == 1:
+                    track_generation = face_tracker.generation if face_tracker else None
+                    mismatch = identity_verifier.verify(frame, faces[0], track_generation) is False
+
+            with timings.stage("head_pose"):
+                direction = analysis.head_pose(0) if face_count == 1 else "Looking Forward"
+
+            with timings.stage("audio"):
+                if audio_replay is not None:
+                    audio_replay.advance_to(current_time - start_time)
+                sound_detected = audio_monitor.sound_in_last(SOUND_WINDOW)
+
+            with timings.stage("overlay"):
+                # Object detection (e.g., Mobile Phone): overlay the most recent result
+                phone = None
+                for (label, conf, (x, y, w, h)) in detected_objects:
+                    cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
+                    cv2.putText(frame, f"{label} {conf:.2f}", (x, y - 10),
+                                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                    if label.lower() == "cell phone":
+                        phone = (label, conf)
+
+            with timings.stage("events"):
+                if handle_event(events, "face_swap", mismatch, current_time, frame,
+                                "Identity mismatch detected", sink):
+                    status_msgs.append("🚫 Different Face Detected")
+                    color = (0, 0, 255)
+
+                # Absence detection
+                if handle_event(events, "no_face", face_count == 0, current_time, frame,
+                                f"No face detected for {ABSENCE_THRESHOLD} seconds", sink):
+                    status_msgs.append("🚫 No Face Detected")
+                    color = (0, 0, 255)
+
+                # Multiple faces
+                if handle_event(events, "multiple_faces", face_count > 1, current_time, frame,
+                                "More than one face in frame", sink):
+                    status_msgs.append("👥 Multiple Faces Detected")
+                    color = (0, 0, 255)
+
+                # Head Pose (Gaze)
+                if handle_event(events, "looking_away", direction != "Looking Forward", current_time, frame,
+                                f"User looking {direction}", sink):
                     status_msgs.append(f"👀 {direction}")
                     color = (0, 0, 255)
-                    threading.Thread(target=sound_alert).start()
-                    take_snapshot(frame, "looking_away", f"User looking {direction}")
-            else:
-                look_away_start_time = None
-        else:
-            look_away_start_time = None
-
-        # Object detection (e.g., Mobile Phone)
-        detected_objects = detect_mobile_objects(frame)
-        for (label, conf, (x, y, w, h)) in detected_objects:
-            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 0, 255), 2)
-            cv2.putText(frame, f"{label} {conf:.2f}", (x, y - 10),
-                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-            if label.lower() == "cell phone":
-                status_msgs.append("📱 Mobile Detected")
-                threading.Thread(target=sound_alert).start()
-                take_snapshot(frame, "mobile_detected", f"Detected: {label} ({conf:.2f})")
-
-        # Audio detection
-        if detect_audio():
-            status_msgs.append("🎹 Sound Detected")
-            threading.Thread(target=sound_alert).start()
-            take_snapshot(frame, "sound_detected", "Microphone input detected")
-
-        # Snapshot every 60 seconds
-        if current_time - last_snapshot_time >= 60:
-            take_snapshot(frame, "periodic")
-            log_event("periodic_snapshot", "Routine snapshot every 60 seconds")
-            last_snapshot_time = current_time
-
-        # Draw overlays
-        final_status = " | ".join(status_msgs)
-        cv2.putText(frame, final_status, (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-        cv2.putText(frame, f"Faces: {face_count}", (30, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-
-        # Draw rectangles on faces
-        for face in faces:
-            x, y, w, h = face.left(), face.top(), face.width(), face.height()
-            cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
-            eyes = detect_eyes_dlib(frame, face)
-            for (ex, ey) in eyes:
-                cv2.circle(frame, (ex, ey), 3, (0, 255, 255), -1)
-
-        # Encode for streaming
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
-
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
-
-    cap.release()
\ No newline at end of file
+
+                if handle_event(events, "mobile_detected", phone is not None, current_time, frame,
+                                f"Detected: {phone[0]} ({phone[1]:.2f})" if phone else "", sink):
+                    status_msgs.append("📱 Mobile Detected")
+
+                # Audio detection: O(1) look at the monitor's rolling window, never blocks the video loop
+                if handle_event(events, "sound_detected", sound_detected, current_time, frame,
+                                "Microphone input detected", sink):
+                    status_msgs.append("🎹 Sound Detected")
+
+                # Snapshot every 60 seconds
+                if current_time - last_snapshot_time >= 60:
+                    take_snapshot(frame, "periodic", sink=sink, ts=current_time)
+                    log_event("periodic_snapshot", "Routine snapshot every 60 seconds", sink, current_time)
+                    last_snapshot_time = current_time
+
+            with timings.stage("overlay"):
+                final_status = " | ".join(status_msgs)
+                cv2.putText(frame, final_status, (30, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+                cv2.putText(frame, f"Faces: {face_count}", (30, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+
+                # Draw rectangles on faces
+                for i, face in enumerate(faces):
+                    x, y, w, h = face.left(), face.top(), face.width(), face.height()
+                    cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+                    eyes = analysis.eyes(i)
+                    for (ex, ey) in eyes:
+                        cv2.circle(frame, (ex, ey), 3, (0, 255, 255), -1)
+
+            try:
+                yield frame
+            finally:
+                # Includes whatever the consumer did with the frame (encoding); runs on close() too,
+                # so the last frame a caller takes is still recorded
+                timings.end_frame()
+    finally:
+        object_worker.stop()
+        audio_monitor.stop()
+        if audio_replay is not None:
+            audio_replay.close()
+        cap.release()
+
+def generate_frames(source=0, audio_path=None, realtime=True, timings=None, sink=None):
+    """Single-viewer MJPEG stream; main.py serves viewers through broadcast.MJPEGBroadcaster instead"""
+    timings = timings or NullTimer()
+    frames = proctor_frames(source, audio_path, realtime, timings, sink)
+    try:
+        for frame in frames:
+            # Encode for streaming
+            with timings.stage("encode"):
+                ret, buffer = cv2.imencode('.jpg', frame)
+                frame = buffer.tobytes()
+
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+    finally:
+        frames.close()
@@ -1,69 +1,106 @@
+import os
 import cv2
 import dlib
 import numpy as np
+from functools import lru_cache
 
-# Load face detector and shape predictor
-detector = dlib.get_frontal_face_detector()
-predictor = dlib.shape_predictor("shape_predictor_68_face_landmarks.dat")
+# === SETTINGS ===
+# Models are loaded on first use from local files, so importing this module is cheap and works offline
+SHAPE_PREDICTOR_PATH = os.getenv("SHAPE_PREDICTOR_PATH", "shape_predictor_68_face_landmarks.dat")
+YOLO_BACKEND = os.getenv("YOLO_BACKEND", "torch")        # torch | opencv | onnxruntime
+YOLO_WEIGHTS = os.getenv("YOLO_WEIGHTS", "yolov5s.pt")   # .pt for torch, .onnx for opencv / onnxruntime
+YOLO_REPO = os.getenv("YOLO_REPO")                       # local clone of ultralytics/yolov5 (offline torch backend)
+YOLO_ONNX_SIZE = int(os.getenv("YOLO_ONNX_SIZE", 640))   # --imgsz of a static ONNX export (OpenCV can't read it)
 
-def detect_faces_dlib(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    return detector(gray)
 
-def detect_eyes_dlib(frame, face):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    landmarks = predictor(gray, face)
-    eyes = []
-    for n in range(36, 48):  # Eye landmarks
-        x = landmarks.part(n).x
-        y = landmarks.part(n).y
-        eyes.append((x, y))
-    return eyes
+@lru_cache(maxsize=None)
+def get_face_detector():
+    return dlib.get_frontal_face_detector()
 
-def detect_multiple_faces(frame):
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = detector(gray)
-    return len(faces)
 
-    # Nose tip 
-def get_head_pose(frame, face):
-    image_points = np.array([
-        (predictor(frame, face).part(30).x, predictor(frame, face).part(30).y),  # Nose tip
-        (predictor(frame, face).part(8).x, predictor(frame, face).part(8).y),    # Chin
-        (predictor(frame, face).part(36).x, predictor(frame, face).part(36).y),  # Left eye left corner
-        (predictor(frame, face).part(45).x, predictor(frame, face).part(45).y),  # Right eye right corner
-        (predictor(frame, face).part(48).x, predictor(frame, face).part(48).y),  # Left Mouth corner
-        (predictor(frame, face).part(54).x, predictor(frame, face).part(54).y)   # Right mouth corner
-    ], dtype="double")
-
-    model_points = np.array([
-        (0.0, 0.0, 0.0),             # Nose tip
-        (0.0, -330.0, -65.0),        # Chin
-        (-225.0, 170.0, -135.0),     # Left eye left corner
-        (225.0, 170.0, -135.0),      # Right eye right corner
-        (-150.0, -150.0, -125.0),    # Left Mouth corner
-        (150.0, -150.0, -125.0)      # Right mouth corner
-    ])
-
-    size = frame.shape
-    focal_length = size[1]
-    center = (size[1] // 2, size[0] // 2)
-
-    camera_matrix = np.array(
+@lru_cache(maxsize=None)
+def get_shape_predictor():
+    if not os.path.exists(SHAPE_PREDICTOR_PATH):
+        raise FileNotFoundError(f"Shape predictor not found at {SHAPE_PREDICTOR_PATH}; see README setup")
+    return dlib.shape_predictor(SHAPE_PREDICTOR_PATH)
+
+# 68-point landmark indices used below
+EYE_POINTS = slice(36, 48)
+POSE_POINTS = [30, 8, 36, 45, 48, 54]  # Nose tip, chin, eye corners, mouth corners
+
+# 3D reference points matching POSE_POINTS
+MODEL_POINTS = np.array([
+    (0.0, 0.0, 0.0),             # Nose tip
+    (0.0, -330.0, -65.0),        # Chin
+    (-225.0, 170.0, -135.0),     # Left eye left corner
+    (225.0, 170.0, -135.0),      # Right eye right corner
+    (-150.0, -150.0, -125.0),    # Left Mouth corner
+    (150.0, -150.0, -125.0)      # Right mouth corner
+])
+DIST_COEFFS = np.zeros((4, 1))  # Assuming no lens distortion
+
+
+class FrameAnalysis:
+    """Per-frame context: grayscale, face boxes and 68-point landmarks computed once and shared by all detectors"""
+
+    def __init__(self, frame, faces=None, tracker=None):
+        self.frame = frame
+        self.gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if faces is None:
+            # A FaceTracker (tracking.py) replaces per-frame detection with detect-then-track
+            faces = tracker.update(self.gray) if tracker is not None else get_face_detector()(self.gray)
+        self.faces = faces
+        self._landmarks = {}
+
+    @property
+    def face_count(self):
+        return len(self.faces)
+
+    def landmarks(self, index):
+        """(68, 2) int array for face `index`; the predictor runs at most once per face"""
+        points = self._landmarks.get(index)
+        if points is None:
+            points = self._landmarks[index] = shape_to_array(get_shape_predictor()(self.gray, self.faces[index]))
+        return points
+
+    def eyes(self, index):
+        return [tuple(point) for point in self.landmarks(index)[EYE_POINTS].tolist()]
+
+    def head_pose(self, index):
+        return head_pose_from_landmarks(self.landmarks(index), self.frame.shape)
+
+
+def analyze_frame(frame, faces=None, tracker=None):
+    return FrameAnalysis(frame, faces, tracker)
+
+
+def shape_to_array(shape):
+    return np.array([(shape.part(n).x, shape.part(n).y) for n in range(shape.num_parts)], dtype=np.int32)
+
+
+@lru_cache(maxsize=8)
+def _camera_matrix(height, width):
+    focal_length = width
+    center = (width // 2, height // 2)
+    return np.array(
         [[focal_length, 0, center[0]],
          [0, focal_length, center[1]],
          [0, 0, 1]], dtype="double"
     )
-    dist_coeffs = np.zeros((4, 1))  # Assuming no lens distortion
+
+
+def head_pose_from_landmarks(landmarks, frame_shape):
+    image_points = landmarks[POSE_POINTS].astype("double")
+    camera_matrix = _camera_matrix(frame_shape[0], frame_shape[1])
 
     success, rotation_vector, translation_vector = cv2.solvePnP(
-        model_points, image_points, camera_matrix, dist_coeffs
+        MODEL_POINTS, image_points, camera_matrix, DIST_COEFFS
     )
 
     rvec_matrix = cv2.Rodrigues(rotation_vector)[0]
     proj_matrix = np.hstack((rvec_matrix, translation_vector))
     eulerAngles = cv2.decomposeProjectionMatrix(proj_matrix)[6]
-    pitch, yaw, roll = [float(angle) for angle in eulerAngles]
+    pitch, yaw, roll = [float(angle) for angle in eulerAngles.flatten()]
 
     # Define thresholds for "looking away"
     if yaw < -15:
@@ -78,34 +115,84 @@ def get_head_pose(frame, face):
         return "Looking Forward"
 
 
+# Single-detector helpers: each builds its own FrameAnalysis, so use analyze_frame()
+# directly when more than one result is needed for the same frame
+def detect_faces_dlib(frame):
+    return analyze_frame(frame).faces
+
+def detect_eyes_dlib(frame, face):
+    return analyze_frame(frame, faces=[face]).eyes(0)
+
+def detect_multiple_faces(frame):
+    return analyze_frame(frame).face_count
+
+def get_head_pose(frame, face):
+    return analyze_frame(frame, faces=[face]).head_pose(0)
+
+
 # Code for Object and Audio Detection ===
 
-import torch
-import torchvision.transforms as T
-import sounddevice as sd
+class TorchYolo:
+    """YOLOv5 through torch.hub; a local repo clone (YOLO_REPO) and weights file keep it offline"""
 
-# Load YOLOv5 model (use 'yolov5s', 'yolov5m', etc.)
-model = torch.hub.load('ultralytics/yolov5', 'yolov5s', trust_repo=True)
-model.eval()
+    def __init__(self, weights=YOLO_WEIGHTS, repo=YOLO_REPO):
+        import torch
 
-def detect_mobile_objects(frame):
-    results = model(frame)
+        if repo:
+            self.model = torch.hub.load(repo, 'custom', path=weights, source='local')
+        elif os.path.exists(weights):
+            self.model = torch.hub.load('ultralytics/yolov5', 'custom', path=weights, trust_repo=True)
+        else:
+            self.model = torch.hub.load('ultralytics/yolov5', 'yolov5s', trust_repo=True)
+        self.model.eval()
+        self.names = self.model.names
+
+    def detect(self, frames, size=640):
+        results = self.model([cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames], size=size)  # AutoShape expects RGB
+        return [boxes.cpu().numpy() for boxes in results.xyxy]
+
+
+@lru_cache(maxsize=None)
+def get_yolo(backend=None):
+    """The YOLO model for `backend` (default YOLO_BACKEND), loaded on first call"""
+    backend = backend or YOLO_BACKEND
+    if backend == "torch":
+        return TorchYolo()
+    from yolo_onnx import OnnxYolo
+
+    weights = YOLO_WEIGHTS if YOLO_WEIGHTS.endswith(".onnx") else os.path.splitext(YOLO_WEIGHTS)[0] + ".onnx"
+    if not os.path.exists(weights):
+        raise FileNotFoundError(f"ONNX weights not found at {weights}; export with yolov5's export.py --include onnx")
+    return OnnxYolo(weights, backend=backend, input_size=YOLO_ONNX_SIZE)
+
+
+def _phones_from_boxes(boxes, names):
     detected_objects = []
-    for *box, conf, cls in results.xyxy[0]:
-        label = model.names[int(cls)]
+    for *box, conf, cls in boxes:
+        label = names[int(cls)]
         if label == "cell phone":
             x1, y1, x2, y2 = map(int, box)
             w, h = x2 - x1, y2 - y1
             detected_objects.append((label, float(conf), (x1, y1, w, h)))
     return detected_objects
 
+def detect_mobile_objects(frame):
+    return detect_mobile_objects_batch([frame])[0]
+
+def detect_mobile_objects_batch(frames, size=640):
+    """One forward pass over a list of BGR frames; returns one detection list per frame"""
+    yolo = get_yolo()
+    return [_phones_from_boxes(boxes, yolo.names) for boxes in yolo.detect(frames, size)]
+
 
 def detect_audio(threshold=0.02, duration=1, samplerate=44100):
     try:
+        import sounddevice as sd
+
         audio = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=1, dtype='float64')
         sd.wait()
         rms = np.sqrt(np.mean(audio**2))
         return rms > threshold
     except Exception as e:
         print(f"Audio detection error: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,37 @@
+from flask import Blueprint, request, jsonify
+
+from event_store import DEFAULT_QUERY_LIMIT
+
+
+def create_event_blueprint(store):
+    """Read-only review endpoints over an EventStore, shared by main.py and session_server.py"""
+    events_api = Blueprint("events", __name__)
+
+    @events_api.route('/events')
+    def query_events():
+        try:
+            rows = store.query(
+                session_id=request.args.get("session_id"),
+                event=request.args.get("event"),
+                start=request.args.get("start"),
+                end=request.args.get("end"),
+                # SQLite treats a negative LIMIT as "no limit", so clamp both ends
+                limit=max(1, min(request.args.get("limit", DEFAULT_QUERY_LIMIT, type=int), DEFAULT_QUERY_LIMIT)),
+                offset=max(0, request.args.get("offset", 0, type=int)),
+            )
+        except ValueError as e:
+            return jsonify({"error": f"Bad time filter: {e}"}), 400
+        return jsonify({"events": rows, "count": len(rows)})
+
+    @events_api.route('/events/sessions')
+    def list_sessions():
+        return jsonify({"sessions": store.sessions()})
+
+    @events_api.route('/events/sessions/<session_id>/summary')
+    def session_summary(session_id):
+        summary = store.session_summary(session_id)
+        if summary is None:
+            return jsonify({"error": "Unknown session"}), 404
+        return jsonify(summary)
+
+    return events_api
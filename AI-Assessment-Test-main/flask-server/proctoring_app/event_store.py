@@ -0,0 +1,197 @@
+import csv
+import re
+import sqlite3
+import sys
+import threading
+from datetime import datetime
+
+# === SETTINGS ===
+EVENT_DB = "events.db"
+TIMESTAMP_FORMAT = "%Y-%m-%d_%H-%M-%S"   # format used in snapshot_log.csv
+DEFAULT_QUERY_LIMIT = 1000
+CLEARED_SUFFIX = "_cleared"
+_DURATION = re.compile(r"Lasted ([\d.]+) seconds")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    ts REAL NOT NULL,
+    filename TEXT NOT NULL DEFAULT '',
+    details TEXT NOT NULL DEFAULT '',
+    duration REAL
+);
+CREATE INDEX IF NOT EXISTS idx_events_session_ts ON events (session_id, ts);
+CREATE INDEX IF NOT EXISTS idx_events_event_ts ON events (event, ts);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+
+-- Per-session summaries, kept up to date on every insert so reviews never scan events
+CREATE TABLE IF NOT EXISTS session_event_totals (
+    session_id TEXT NOT NULL,
+    event TEXT NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    total_duration REAL NOT NULL DEFAULT 0,
+    first_ts REAL NOT NULL,
+    last_ts REAL NOT NULL,
+    PRIMARY KEY (session_id, event)
+);
+"""
+
+
+def parse_timestamp(value):
+    """Unix seconds from a float/int, a numeric string, a snapshot_log timestamp or an ISO string"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    try:
+        return datetime.strptime(value, TIMESTAMP_FORMAT).timestamp()
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def cleared_duration(event, details):
+    """Incident length carried by an "<event>_cleared" row ("Lasted 12.3 seconds"), else None"""
+    if not event.endswith(CLEARED_SUFFIX):
+        return None
+    match = _DURATION.search(details or "")
+    return float(match.group(1)) if match else None
+
+
+class EventStore:
+    """Proctoring events in SQLite, indexed by session, event type and time.
+
+    session_event_totals is maintained in the same transaction as each insert: one row
+    per (session, event) with the count, first/last time and, for incidents that have
+    cleared, their total duration (e.g. total look-away time)."""
+
+    def __init__(self, path=EVENT_DB):
+        self.path = path
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA busy_timeout=30000")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    def record(self, session_id, event, ts, filename="", details="", duration=None):
+        self.record_many([(session_id, event, ts, filename, details, duration)])
+
+    def record_many(self, rows):
+        """Insert (session_id, event, ts, filename, details[, duration]) rows in one transaction"""
+        events, totals = [], []
+        for row in rows:
+            session_id, event, ts, filename, details = row[:5]
+            duration = row[5] if len(row) > 5 else None
+            if duration is None:
+                duration = cleared_duration(event, details)
+            ts = parse_timestamp(ts)
+            events.append((session_id, event, ts, filename or "", details or "", duration))
+            if event.endswith(CLEARED_SUFFIX):
+                # The duration belongs to the incident itself, not to a separate "cleared" count
+                totals.append((session_id, event[:-len(CLEARED_SUFFIX)], 0, duration or 0.0, ts, ts))
+            else:
+                totals.append((session_id, event, 1, 0.0, ts, ts))
+        if not events:
+            return
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO events (session_id, event, ts, filename, details, duration) VALUES (?, ?, ?, ?, ?, ?)",
+                events)
+            conn.executemany(
+                "INSERT INTO session_event_totals (session_id, event, count, total_duration, first_ts, last_ts) "
+                "VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(session_id, event) DO UPDATE SET "
+                "count = count + excluded.count, total_duration = total_duration + excluded.total_duration, "
+                "first_ts = MIN(first_ts, excluded.first_ts), last_ts = MAX(last_ts, excluded.last_ts)",
+                totals)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def query(self, session_id=None, event=None, start=None, end=None, limit=DEFAULT_QUERY_LIMIT, offset=0):
+        """Events matching every given filter, oldest first"""
+        clauses, params = [], []
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if event is not None:
+            clauses.append("event = ?")
+            params.append(event)
+        if start is not None:
+            clauses.append("ts >= ?")
+            params.append(parse_timestamp(start))
+        if end is not None:
+            clauses.append("ts < ?")
+            params.append(parse_timestamp(end))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._conn().execute(
+            f"SELECT session_id, event, ts, filename, details, duration FROM events {where} "
+            f"ORDER BY ts, id LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+        return [dict(row) for row in rows]
+
+    def session_summary(self, session_id):
+        rows = self._conn().execute(
+            "SELECT event, count, total_duration, first_ts, last_ts FROM session_event_totals WHERE session_id = ?",
+            (session_id,)).fetchall()
+        if not rows:
+            return None
+        return {
+            "session_id": session_id,
+            "first_ts": min(row["first_ts"] for row in rows),
+            "last_ts": max(row["last_ts"] for row in rows),
+            "total_events": sum(row["count"] for row in rows),
+            "events": {row["event"]: {"count": row["count"], "total_duration": row["total_duration"]}
+                       for row in rows},
+        }
+
+    def sessions(self):
+        rows = self._conn().execute(
+            "SELECT session_id, SUM(count) AS total_events, MIN(first_ts) AS first_ts, MAX(last_ts) AS last_ts "
+            "FROM session_event_totals GROUP BY session_id ORDER BY last_ts DESC").fetchall()
+        return [dict(row) for row in rows]
+
+    def import_csv(self, path, session_id, batch_size=5000):
+        """Bulk-load an existing snapshot_log.csv (with or without its header row); returns rows imported"""
+        imported, batch = 0, []
+        with open(path, newline="") as log_file:
+            for row in csv.reader(log_file):
+                if not row or row[0] == "Event":
+                    continue
+                row = (row + ["", "", "", ""])[:4]
+                event, timestamp, filename, details = row
+                try:
+                    ts = parse_timestamp(timestamp)
+                except ValueError:
+                    print(f"[Import] Skipping row with bad timestamp: {row}")
+                    continue
+                batch.append((session_id, event, ts, filename, details))
+                if len(batch) >= batch_size:
+                    self.record_many(batch)
+                    imported += len(batch)
+                    batch = []
+        self.record_many(batch)
+        return imported + len(batch)
+
+
+if __name__ == "__main__":
+    # python event_store.py import snapshot_log.csv SESSION_ID [events.db]
+    if len(sys.argv) < 4 or sys.argv[1] != "import":
+        raise SystemExit("usage: python event_store.py import CSV SESSION_ID [DB]")
+    store = EventStore(sys.argv[4] if len(sys.argv) > 4 else EVENT_DB)
+    count = store.import_csv(sys.argv[2], sys.argv[3])
+    print(f"Imported {count} events into {store.path} as session {sys.argv[3]}")
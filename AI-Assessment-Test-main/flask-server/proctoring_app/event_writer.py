@@ -0,0 +1,154 @@
+import csv
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+# === SETTINGS ===
+WRITER_QUEUE_SIZE = 64     # snapshots waiting to be encoded/written
+FLUSH_INTERVAL = 1.0       # seconds between CSV flushes
+FLUSH_ROWS = 50            # flush early once this many log rows are buffered
+LOG_HEADER = ["Event", "Timestamp", "Filename", "Details"]
+
+
+class EventWriter:
+    """Background writer for snapshots and the CSV event log.
+
+    The video loop only copies the frame and enqueues it; hashing, JPEG encoding and
+    file writes (via a SnapshotStore) and CSV appends happen on one writer thread, with log rows batched and flushed
+    every FLUSH_INTERVAL (or FLUSH_ROWS rows) through a file handle kept open.
+
+    Back-pressure: when the snapshot queue is full the image is dropped, but the event
+    is still logged (marked "snapshot dropped") so the audit trail stays complete.
+
+    With an EventStore, each flushed batch is also inserted into it under `session_id`."""
+
+    def __init__(self, log_path, snapshots, queue_size=WRITER_QUEUE_SIZE,
+                 flush_interval=FLUSH_INTERVAL, flush_rows=FLUSH_ROWS, store=None, session_id="local"):
+        self.log_path = log_path
+        self.snapshots = snapshots
+        self.store = store
+        self.session_id = session_id
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self._snapshots = queue.Queue(maxsize=queue_size)
+        self._rows = []
+        self._rows_lock = threading.Lock()
+        self._running = False
+        self._thread = None
+        self._log_file = None
+        self.stats = {"snapshots": 0, "snapshots_dropped": 0, "rows": 0, "flushes": 0, "write_errors": 0}
+
+    def start(self):
+        new_log = not os.path.exists(self.log_path)
+        self._log_file = open(self.log_path, mode='a', newline='')
+        if new_log:
+            csv.writer(self._log_file).writerow(LOG_HEADER)
+            self._log_file.flush()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if not self._running:
+            return
+        self._running = False
+        try:
+            self._snapshots.put(None, timeout=5)  # waits for room while the writer drains
+        except queue.Full:
+            pass
+        self._thread.join(timeout=10)
+        self._flush()
+        self._log_file.close()
+
+    # --- called from the video loop; never touches the disk ---
+    def snapshot(self, frame, event, details="", ts=None):
+        """Queue a snapshot + log row (at `ts`, default now); returns False if the snapshot had to be dropped"""
+        now = time.time() if ts is None else ts
+        try:
+            self._snapshots.put_nowait((frame.copy(), event, now, details))
+        except queue.Full:
+            self.stats["snapshots_dropped"] += 1
+            self._append_row([event, _timestamp(now), "", f"{details} (snapshot dropped)".strip()], now)
+            return False
+        return True
+
+    def log(self, event, details="", ts=None):
+        now = time.time() if ts is None else ts
+        self._append_row([event, _timestamp(now), "", details], now)
+
+    def _append_row(self, row, ts):
+        with self._rows_lock:
+            self._rows.append((row, ts))
+
+    # --- writer thread ---
+    def _run(self):
+        last_flush = time.monotonic()
+        while True:
+            try:
+                item = self._snapshots.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                return
+            if item:
+                self._write_snapshot(*item)
+
+            with self._rows_lock:
+                pending = len(self._rows)
+            if pending >= self.flush_rows or (pending and time.monotonic() - last_flush >= self.flush_interval):
+                self._flush()
+                last_flush = time.monotonic()
+
+    def _write_snapshot(self, frame, event, ts, details):
+        try:
+            filename, note = self.snapshots.save(frame, event, ts)
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            print(f"[Snapshot Error] {event}: {e}")
+            filename, note = None, "snapshot failed"
+        if filename and note != "duplicate":
+            self.stats["snapshots"] += 1
+            print(f"[Snapshot] {event} saved at {filename}")
+        if note:
+            details = f"{details} ({note})".strip()
+        self._append_row([event, _timestamp(ts), filename or "", details], ts)
+
+    def _flush(self):
+        with self._rows_lock:
+            rows, self._rows = self._rows, []
+        if not rows:
+            return
+        try:
+            csv.writer(self._log_file).writerows(row for row, _ in rows)
+            self._log_file.flush()
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            print(f"[Log Error] {self.log_path}: {e}")
+            return
+        self.stats["rows"] += len(rows)
+        self.stats["flushes"] += 1
+
+        if self.store is not None:
+            try:
+                self.store.record_many([(self.session_id, event, ts, filename, details)
+                                        for (event, _, filename, details), ts in rows])
+            except Exception as e:
+                self.stats["write_errors"] += 1
+                print(f"[Event Store Error] {e}")
+
+
+class NullEventSink:
+    """Stands in for an EventWriter when events must not be recorded (e.g. benchmark replays)"""
+
+    def snapshot(self, frame, event, details="", ts=None):
+        return True
+
+    def log(self, event, details="", ts=None):
+        pass
+
+
+def _timestamp(ts):
+    return datetime.fromtimestamp(ts).strftime("%Y-%m-%d_%H-%M-%S")
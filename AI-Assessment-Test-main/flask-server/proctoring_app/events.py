@@ -0,0 +1,121 @@
+import queue
+import threading
+
+# === SETTINGS ===
+# hold: seconds a condition must persist before it becomes an incident (the old absence/look-away timers)
+# cooldown: minimum seconds between two alerts/snapshots for the same event type
+# clear_after: seconds a condition must be gone before the incident is considered over
+EVENT_RULES = {
+    "face_swap":       {"hold": 0,  "cooldown": 30, "clear_after": 2.0},
+    "no_face":         {"hold": 10, "cooldown": 30, "clear_after": 1.0},
+    "multiple_faces":  {"hold": 0,  "cooldown": 15, "clear_after": 1.0},
+    "looking_away":    {"hold": 5,  "cooldown": 15, "clear_after": 1.0},
+    "mobile_detected": {"hold": 0,  "cooldown": 20, "clear_after": 2.0},
+    "sound_detected":  {"hold": 0,  "cooldown": 10, "clear_after": 1.0},
+}
+DEFAULT_RULE = {"hold": 0, "cooldown": 10, "clear_after": 1.0}
+ALERT_QUEUE_SIZE = 4
+
+# Transitions returned by EventEngine.update()
+ONSET = "onset"
+ONGOING = "ongoing"
+CLEARED = "cleared"
+
+_IDLE, _PENDING, _ACTIVE = "idle", "pending", "active"
+
+
+class EventEngine:
+    """Per-event-type state machines: idle -> pending (hold) -> active -> idle.
+
+    update() is called every frame with whether the condition currently holds and
+    returns ONSET once per incident (subject to the event's cooldown), ONGOING while it
+    lasts and CLEARED when it has been gone for clear_after seconds. Callers alert and
+    snapshot on ONSET only, so a condition that persists for minutes is one incident."""
+
+    def __init__(self, rules=None):
+        self.rules = dict(EVENT_RULES, **(rules or {}))
+        self._states = {}
+        self.stats = {"onsets": 0, "suppressed": 0, "cleared": 0}
+
+    def _state(self, event):
+        state = self._states.get(event)
+        if state is None:
+            state = self._states[event] = {"phase": _IDLE, "since": None, "last_true": None, "last_alert": None}
+        return state
+
+    def update(self, event, condition, now):
+        rule = self.rules.get(event, DEFAULT_RULE)
+        state = self._state(event)
+
+        if condition:
+            state["last_true"] = now
+            if state["phase"] == _IDLE:
+                state["phase"], state["since"] = _PENDING, now
+            if state["phase"] == _PENDING:
+                if now - state["since"] < rule["hold"]:
+                    return None
+                state["phase"] = _ACTIVE
+                if state["last_alert"] is None or now - state["last_alert"] >= rule["cooldown"]:
+                    state["last_alert"] = now
+                    self.stats["onsets"] += 1
+                    return ONSET
+                self.stats["suppressed"] += 1  # a new incident inside the cooldown window
+            return ONGOING
+
+        if state["phase"] == _PENDING:
+            state["phase"] = _IDLE  # condition broke before the hold elapsed
+        elif state["phase"] == _ACTIVE:
+            if now - state["last_true"] < rule["clear_after"]:
+                return ONGOING
+            state["phase"] = _IDLE
+            self.stats["cleared"] += 1
+            return CLEARED
+        return None
+
+    def is_active(self, event):
+        state = self._states.get(event)
+        return state is not None and state["phase"] == _ACTIVE
+
+    def duration(self, event, now):
+        """Seconds since the condition first held, for the current or just-cleared incident"""
+        state = self._states.get(event)
+        if state is None or state["since"] is None:
+            return 0.0
+        return now - state["since"]
+
+
+class AlertPlayer:
+    """One background thread playing alert sounds from a small bounded queue.
+
+    Alerts that arrive while the queue is full are dropped: a burst of incidents
+    produces a few sounds, never a pile of threads."""
+
+    def __init__(self, play_fn, queue_size=ALERT_QUEUE_SIZE):
+        self.play_fn = play_fn
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._thread = threading.Thread(target=self._run, name="alert-player", daemon=True)
+        self.stats = {"played": 0, "dropped": 0}
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def alert(self, *args):
+        try:
+            self._queue.put_nowait(args)
+        except queue.Full:
+            self.stats["dropped"] += 1
+
+    def _run(self):
+        while True:
+            args = self._queue.get()
+            if args is None:
+                return
+            self.play_fn(*args)
+            self.stats["played"] += 1
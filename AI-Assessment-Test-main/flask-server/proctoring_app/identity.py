@@ -1,16 +1,152 @@
+import os
+import sys
+
 import cv2
+import numpy as np
 import face_recognition
 
-def get_face_encoding(frame):
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    encodings = face_recognition.face_encodings(rgb_frame)
-    if encodings:
-        return encodings[0]
-    return None
-
-def compare_face_encoding(known_encoding, frame):
-    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    encodings = face_recognition.face_encodings(rgb_frame)
-    if not encodings:
+# === SETTINGS ===
+EMBEDDING_STORE = "known_faces.npz"   # enrolled candidate embeddings, loaded at startup
+MATCH_TOLERANCE = 0.6                 # face_recognition's default distance threshold
+REENCODE_EVERY = 15                   # frames between identity re-checks of a tracked face
+CROP_MARGIN = 0.25                    # extra context around the face box when encoding
+
+
+def _to_location(face):
+    """dlib rectangle -> face_recognition (top, right, bottom, left)"""
+    return (face.top(), face.right(), face.bottom(), face.left())
+
+
+def encode_face(frame, face=None):
+    """128-d embedding for one face. With a known face box only that region is converted and encoded."""
+    if face is None:
+        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        encodings = face_recognition.face_encodings(rgb_frame)
+        return encodings[0] if encodings else None
+
+    height, width = frame.shape[:2]
+    top, right, bottom, left = _to_location(face)
+    margin_y, margin_x = int((bottom - top) * CROP_MARGIN), int((right - left) * CROP_MARGIN)
+    y0, y1 = max(0, top - margin_y), min(height, bottom + margin_y)
+    x0, x1 = max(0, left - margin_x), min(width, right + margin_x)
+    if y1 <= y0 or x1 <= x0:
+        return None
+    rgb_crop = cv2.cvtColor(frame[y0:y1, x0:x1], cv2.COLOR_BGR2RGB)
+    location = (max(0, top - y0), min(x1 - x0, right - x0), min(y1 - y0, bottom - y0), max(0, left - x0))
+    encodings = face_recognition.face_encodings(rgb_crop, known_face_locations=[location])
+    return encodings[0] if encodings else None
+
+
+def get_face_encoding(frame, face=None):
+    return encode_face(frame, face)
+
+
+def compare_face_encoding(known_encoding, frame, face=None):
+    encoding = encode_face(frame, face)
+    if encoding is None:
         return False
-    return face_recognition.compare_faces([known_encoding], encodings[0])[0]
+    return bool(np.linalg.norm(known_encoding - encoding) <= MATCH_TOLERANCE)
+
+
+class EmbeddingGallery:
+    """Enrolled candidate embeddings as one (N, 128) matrix, matched with a single vectorized distance"""
+
+    def __init__(self, names=None, encodings=None):
+        self.names = list(names or [])
+        self.encodings = np.asarray(encodings, dtype=np.float64).reshape(-1, 128) if encodings is not None \
+            else np.empty((0, 128))
+
+    @classmethod
+    def load(cls, path=EMBEDDING_STORE):
+        if not os.path.exists(path):
+            return cls()
+        data = np.load(path, allow_pickle=False)
+        return cls(data["names"].tolist(), data["encodings"])
+
+    def save(self, path=EMBEDDING_STORE):
+        np.savez(path, names=np.array(self.names, dtype=str), encodings=self.encodings)
+
+    def __len__(self):
+        return len(self.names)
+
+    def enroll(self, name, encoding):
+        self.names.append(name)
+        self.encodings = np.vstack([self.encodings, np.asarray(encoding, dtype=np.float64)[None, :]])
+
+    def distances(self, encoding):
+        return np.linalg.norm(self.encodings - encoding, axis=1)
+
+    def match(self, encoding, tolerance=MATCH_TOLERANCE):
+        """(name, distance) of the closest enrolled candidate, or (None, distance) if nobody is within tolerance"""
+        if len(self) == 0:
+            return None, float("inf")
+        distances = self.distances(encoding)
+        best = int(np.argmin(distances))
+        if distances[best] > tolerance:
+            return None, float(distances[best])
+        return self.names[best], float(distances[best])
+
+
+class IdentityVerifier:
+    """Per-session identity check that reuses the tracked face box and only re-encodes
+    every REENCODE_EVERY frames or when the face tracker restarts"""
+
+    def __init__(self, gallery=None, candidate=None, reencode_every=REENCODE_EVERY, tolerance=MATCH_TOLERANCE):
+        self.gallery = gallery if gallery is not None else EmbeddingGallery()
+        if candidate is not None and candidate not in self.gallery.names:
+            # Matching against a name with no embedding would flag every frame as a face swap
+            print(f"[Identity Warning] '{candidate}' is not enrolled, using the first face seen as the reference")
+            candidate = None
+        self.candidate = candidate          # expected enrolled name; None = first face seen becomes the reference
+        self.reencode_every = reencode_every
+        self.tolerance = tolerance
+        self._session_encoding = None
+        self._frames_since_check = reencode_every
+        self._track_generation = None
+        self._last_result = None
+        self.last_identity = None
+
+    def reset(self):
+        self._frames_since_check = self.reencode_every
+
+    def verify(self, frame, face, track_generation=None):
+        """True if the face matches, False on a mismatch, None while nothing could be encoded yet"""
+        self._frames_since_check += 1
+        if track_generation != self._track_generation:
+            self._track_generation = track_generation
+            self.reset()
+        if self._frames_since_check < self.reencode_every:
+            return self._last_result
+
+        encoding = encode_face(frame, face)
+        if encoding is None:
+            return self._last_result
+        self._frames_since_check = 0
+
+        if self.candidate is not None:
+            name, _ = self.gallery.match(encoding, self.tolerance)
+            self.last_identity = name
+            self._last_result = name == self.candidate
+        elif self._session_encoding is None:
+            self._session_encoding = encoding
+            self.last_identity, _ = self.gallery.match(encoding, self.tolerance)
+            self._last_result = True
+        else:
+            self._last_result = bool(np.linalg.norm(self._session_encoding - encoding) <= self.tolerance)
+        return self._last_result
+
+
+if __name__ == "__main__":
+    # python identity.py enroll "Candidate Name" photo.jpg [store.npz]
+    if len(sys.argv) < 4 or sys.argv[1] != "enroll":
+        raise SystemExit("usage: python identity.py enroll NAME IMAGE [STORE]")
+    name, image_path = sys.argv[2], sys.argv[3]
+    store = sys.argv[4] if len(sys.argv) > 4 else EMBEDDING_STORE
+    image = cv2.imread(image_path)
+    encoding = encode_face(image) if image is not None else None
+    if encoding is None:
+        raise SystemExit(f"No face found in {image_path}")
+    gallery = EmbeddingGallery.load(store)
+    gallery.enroll(name, encoding)
+    gallery.save(store)
+    print(f"Enrolled {name} ({len(gallery)} candidates in {store})")
@@ -0,0 +1,134 @@
+# load_generator.py
+"""
+Replays video files as many simulated candidate sessions against session_server.py.
+
+Each video is decoded and JPEG-encoded once up front, so the generator itself stays
+cheap; every session then loops over its video's frames at the target FPS on its own
+thread and keep-alive connection.
+
+    python load_generator.py exam1.mp4 exam2.mp4 --sessions 200 --fps 5 --duration 60
+"""
+import argparse
+import http.client
+import threading
+import time
+from urllib.parse import urlparse
+
+import cv2
+import numpy as np
+
+
+def load_frames(path, max_frames, width, raw):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if width and frame.shape[1] > width:
+            scale = width / frame.shape[1]
+            frame = cv2.resize(frame, (width, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        if raw:
+            frames.append((frame.tobytes(), frame.shape))
+        else:
+            frames.append((cv2.imencode('.jpg', frame)[1].tobytes(), frame.shape))
+    cap.release()
+    return frames
+
+
+def run_session(session_id, frames, args, url, stop_at, results):
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+    interval = 1.0 / args.fps
+    latencies, codes = [], {}
+    index = 0
+    started = time.time()
+    next_send = time.monotonic()
+
+    while time.monotonic() < stop_at:
+        payload, shape = frames[index % len(frames)]
+        headers = {"X-Frame-Timestamp": f"{started + index * interval:.3f}"}
+        if args.raw:
+            headers.update({"Content-Type": "application/octet-stream",
+                            "X-Frame-Height": str(shape[0]), "X-Frame-Width": str(shape[1])})
+        else:
+            headers["Content-Type"] = "image/jpeg"
+
+        sent = time.perf_counter()
+        try:
+            conn.request("POST", f"/sessions/{session_id}/frames", body=payload, headers=headers)
+            response = conn.getresponse()
+            response.read()
+            codes[response.status] = codes.get(response.status, 0) + 1
+        except (OSError, http.client.HTTPException):
+            codes["error"] = codes.get("error", 0) + 1
+            conn.close()
+            conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+        latencies.append(time.perf_counter() - sent)
+
+        index += 1
+        next_send += interval
+        delay = next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    try:
+        conn.request("DELETE", f"/sessions/{session_id}")
+        conn.getresponse().read()
+    except (OSError, http.client.HTTPException):
+        pass
+    conn.close()
+    results[session_id] = (latencies, codes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay videos as simulated proctoring sessions")
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--url", default="http://127.0.0.1:5002")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--fps", type=float, default=5.0)
+    parser.add_argument("--duration", type=float, default=30.0)
+    parser.add_argument("--width", type=int, default=640, help="downscale frames wider than this")
+    parser.add_argument("--max-frames", type=int, default=300, help="frames kept per video (looped)")
+    parser.add_argument("--raw", action="store_true", help="send raw BGR frames instead of JPEG")
+    args = parser.parse_args()
+
+    url = urlparse(args.url)
+    videos = [load_frames(path, args.max_frames, args.width, args.raw) for path in args.videos]
+    videos = [frames for frames in videos if frames]
+    if not videos:
+        raise SystemExit("No frames read from the given videos")
+
+    results = {}
+    stop_at = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=run_session, args=(f"sim-{i}", videos[i % len(videos)], args, url, stop_at, results),
+                         daemon=True)
+        for i in range(args.sessions)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies = np.array([l for lats, _ in results.values() for l in lats])
+    codes = {}
+    for _, session_codes in results.values():
+        for code, count in session_codes.items():
+            codes[code] = codes.get(code, 0) + count
+    total = int(latencies.size)
+    accepted = codes.get(202, 0)
+
+    print(f"{args.sessions} sessions x {args.fps} FPS for {args.duration:.0f}s -> {total} frames sent")
+    print(f"Accepted: {accepted} ({accepted / max(total, 1):.1%}), dropped (429): {codes.get(429, 0)}, "
+          f"other: { {k: v for k, v in codes.items() if k not in (202, 429)} }")
+    if total:
+        p50, p95, p99 = np.percentile(latencies * 1000, [50, 95, 99])
+        print(f"Ingest latency ms: p50 {p50:.1f}  p95 {p95:.1f}  p99 {p99:.1f}")
+
+    conn = http.client.HTTPConnection(url.hostname, url.port or 80, timeout=10)
+    conn.request("GET", "/stats")
+    print(f"Server stats: {conn.getresponse().read().decode()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,15 @@
 # webapp.py
 
-from flask import Flask, render_template, Response
-from camera import generate_frames
+from flask import Flask, render_template, Response, jsonify
+from camera import proctor_frames, event_store
+from broadcast import MJPEGBroadcaster
+from event_api import create_event_blueprint
 
 app = Flask(__name__)
+app.register_blueprint(create_event_blueprint(event_store))
+
+# One capture/analysis pipeline and one JPEG encode per frame, shared by every viewer
+broadcaster = MJPEGBroadcaster(proctor_frames)
 
 @app.route('/')
 def index():
@@ -11,8 +17,12 @@ def index():
 
 @app.route('/video_feed')
 def video_feed():
-    return Response(generate_frames(),
+    return Response(broadcaster.subscribe(),
                     mimetype='multipart/x-mixed-replace; boundary=frame')
 
+@app.route('/stream_stats')
+def stream_stats():
+    return jsonify(broadcaster.status())
+
 if __name__ == '__main__':
-    app.run(debug=True, port=5001)
+    app.run(debug=True, port=5001, threaded=True)
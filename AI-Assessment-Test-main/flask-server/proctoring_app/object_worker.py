@@ -0,0 +1,106 @@
+import threading
+import time
+
+from detection import detect_mobile_objects_batch
+
+# === SETTINGS ===
+YOLO_RATE_HZ = 2.0        # max object-detection passes per second
+YOLO_INPUT_SIZE = 416     # model input size, longest side (pixels); frames are letterboxed by the model
+DETECTION_MAX_AGE = 1.5   # seconds a result stays on screen without a newer one
+
+
+class ObjectDetectionWorker:
+    """Runs YOLO on a background thread at a fixed rate, always on the newest submitted frame.
+
+    The video loop calls submit() every frame (stale frames are simply overwritten)
+    and latest() to overlay the most recent detections, so stream FPS no longer
+    depends on model inference time. detect_fn(frames, size) gets full-resolution frames
+    and returns boxes in their coordinates, like detect_mobile_objects_batch."""
+
+    def __init__(self, detect_fn=detect_mobile_objects_batch, rate_hz=YOLO_RATE_HZ,
+                 input_size=YOLO_INPUT_SIZE, max_age=DETECTION_MAX_AGE):
+        self.detect_fn = detect_fn
+        self.interval = 1.0 / rate_hz
+        self.input_size = input_size
+        self.max_age = max_age
+        self._cond = threading.Condition()
+        self._pending = None          # frame waiting for the worker
+        self._results = []
+        self._result_id = 0
+        self._result_time = 0.0
+        self._running = False
+        self._thread = None
+        self.stats = {"submitted": 0, "processed": 0, "dropped": 0}
+
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="yolo-worker", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+
+    def submit(self, frame):
+        """Offer the current frame; replaces any frame the worker has not picked up yet"""
+        frame = frame.copy()  # the caller keeps drawing on its frame
+        with self._cond:
+            if self._pending is not None:
+                self.stats["dropped"] += 1
+            self._pending = frame
+            self.stats["submitted"] += 1
+            self._cond.notify()
+
+    def detect_now(self, frame, now):
+        """Run detection inline (replay mode, worker not started); `now` is the caller's clock"""
+        self._store(self._detect(frame), now)
+
+    def latest(self, now=None):
+        """(detections, result_id) for the newest result; empty once it is older than max_age"""
+        now = time.monotonic() if now is None else now
+        with self._cond:
+            if now - self._result_time > self.max_age:
+                return [], self._result_id
+            return self._results, self._result_id
+
+    def _run(self):
+        next_run = time.monotonic()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None or not self._running)
+                if not self._running:
+                    return
+            # Rate limit: sleep until our next slot, then take whatever frame is newest by then
+            delay = next_run - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            with self._cond:
+                if not self._running:
+                    return
+                frame = self._pending
+                self._pending = None
+            next_run = time.monotonic() + self.interval
+
+            self._store(self._detect(frame), time.monotonic())
+
+    def _detect(self, frame):
+        # The model letterboxes to input_size itself and maps boxes back to this frame,
+        # so there is no pre-shrink here (that would just be upscaled again to 640)
+        try:
+            return self.detect_fn([frame], self.input_size)[0]
+        except Exception as e:
+            print(f"[Object Detection Error] {e}")
+            return None
+
+    def _store(self, detections, now):
+        if detections is None:
+            return
+        with self._cond:
+            self._results = detections
+            self._result_id += 1
+            self._result_time = now
+            self.stats["processed"] += 1
@@ -0,0 +1,93 @@
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+import numpy as np
+
+PIPELINE_STAGES = ["capture", "face_detection", "landmarks", "head_pose", "identity", "yolo",
+                   "audio", "events", "overlay", "encode"]
+
+
+class StageTimer:
+    """Per-frame, per-stage wall-clock timings for the proctoring pipeline.
+
+    A stage entered several times in one frame is summed, so every sample is "time
+    this stage cost this frame". The first `warmup_frames` completed frames are not
+    recorded (model loading, caches)."""
+
+    def __init__(self, warmup_frames=0):
+        self.warmup_frames = warmup_frames
+        self.samples = defaultdict(list)
+        self.frame_totals = []
+        self._frame_start = None
+        self._current = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._current[name] += time.perf_counter() - start
+
+    def start_frame(self):
+        self._frame_start = time.perf_counter()
+        self._current.clear()
+
+    def end_frame(self):
+        if self._frame_start is None:
+            return
+        if self.warmup_frames > 0:
+            self.warmup_frames -= 1
+            self._frame_start = None
+            return
+        self.frame_totals.append(time.perf_counter() - self._frame_start)
+        for name, elapsed in self._current.items():
+            self.samples[name].append(elapsed)
+        self._frame_start = None
+
+    def report(self):
+        """{stage: {mean, p50, p95, p99 (ms), share}} plus a "frame" row and overall FPS"""
+        total = sum(sum(values) for values in self.samples.values()) or 1e-9
+        rows = {}
+        for name in PIPELINE_STAGES + sorted(set(self.samples) - set(PIPELINE_STAGES)):
+            values = self.samples.get(name)
+            if values:
+                rows[name] = dict(_summary(values), share=sum(values) / total)
+        frames = len(self.frame_totals)
+        if frames:
+            rows["frame"] = dict(_summary(self.frame_totals), share=1.0)
+        elapsed = sum(self.frame_totals)
+        return {"frames": frames, "fps": frames / elapsed if elapsed else 0.0, "stages": rows}
+
+
+class NullTimer:
+    """Drop-in for StageTimer when nobody is measuring"""
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def start_frame(self):
+        pass
+
+    def end_frame(self):
+        pass
+
+
+def _summary(values):
+    ms = np.asarray(values) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {"mean": float(ms.mean()), "p50": float(p50), "p95": float(p95), "p99": float(p99)}
+
+
+def format_report(report, title=""):
+    lines = []
+    if title:
+        lines.append(title)
+    lines.append(f"{report['frames']} frames, {report['fps']:.1f} FPS")
+    lines.append(f"{'stage':<15} {'mean ms':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'share':>7}")
+    for name, row in report["stages"].items():
+        lines.append(f"{name:<15} {row['mean']:>8.2f} {row['p50']:>8.2f} {row['p95']:>8.2f} "
+                     f"{row['p99']:>8.2f} {row['share']:>6.1%}")
+    return "\n".join(lines)
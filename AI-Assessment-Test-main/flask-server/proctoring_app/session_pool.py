@@ -0,0 +1,338 @@
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+import zlib
+from functools import partial
+
+import numpy as np
+
+from events import EventEngine, ONSET
+from event_store import CLEARED_SUFFIX
+
+# === SETTINGS ===
+NUM_WORKERS = os.cpu_count() or 2
+WORKER_QUEUE_SIZE = 32          # frames buffered per worker process before new frames are dropped
+MAX_IN_FLIGHT_PER_SESSION = 2   # one slow/fast session can't fill a worker's queue on its own
+MAX_FRAME_AGE = 1.0             # seconds; frames that waited longer than this are skipped by the worker
+SESSION_IDLE_TIMEOUT = 120      # seconds without frames before a worker forgets a session
+OBJECT_RATE_HZ = 2.0            # YOLO passes per session per second
+INFERENCE_QUEUE_SIZE = 64       # frames waiting for the shared YOLO process before new ones are skipped
+YOLO_INPUT_SIZE = 416           # model input size for batched inference
+STATS_INTERVAL = 2.0            # seconds between batch-metric reports from the inference process
+
+
+def _decode(kind, payload, shape):
+    import cv2
+
+    if kind == "jpeg":
+        return cv2.imdecode(np.frombuffer(payload, dtype=np.uint8), cv2.IMREAD_COLOR)
+    return np.frombuffer(payload, dtype=np.uint8).reshape(shape)
+
+
+def _worker_main(worker_id, tasks, results, max_frame_age, idle_timeout):
+    """Worker process: owns every session hashed to it, so per-session state never crosses processes"""
+    from identity import EmbeddingGallery, EMBEDDING_STORE
+    from session_state import ProctorSession
+
+    gallery = EmbeddingGallery.load(EMBEDDING_STORE)
+    sessions = {}
+    last_sweep = time.monotonic()
+
+    while True:
+        task = tasks.get()
+        if task is None:
+            return
+        op, session_id = task[0], task[1]
+
+        if op == "close":
+            sessions.pop(session_id, None)
+            continue
+
+        _, _, candidate, timestamp, enqueued_at, kind, payload, shape = task
+        if time.time() - enqueued_at > max_frame_age:
+            results.put(("stale", session_id, None))
+            continue
+
+        try:
+            frame = _decode(kind, payload, shape)
+            if frame is None:
+                raise ValueError("could not decode frame")
+            session = sessions.get(session_id)
+            if session is None:
+                session = sessions[session_id] = ProctorSession(session_id, gallery, candidate)
+            result = session.process(frame, timestamp)
+            result["worker"] = worker_id
+            result["latency"] = time.time() - enqueued_at
+            results.put(("result", session_id, result))
+        except Exception as e:
+            print(f"[Worker {worker_id} Error] {session_id}: {e}")
+            results.put(("error", session_id, str(e)))
+
+        now = time.monotonic()
+        if now - last_sweep > idle_timeout:
+            for sid in [sid for sid, s in sessions.items() if now - s.last_seen > idle_timeout]:
+                del sessions[sid]
+            last_sweep = now
+
+
+def _route_objects(results, session_id, enqueued_at, slots, future):
+    slots.release()
+    try:
+        detections = future.result()
+    except Exception as e:
+        results.put(("objects_error", session_id, str(e)))
+        return
+    results.put(("objects", session_id, {"detections": detections, "latency": time.time() - enqueued_at}))
+
+
+def _inference_main(requests, results, max_frame_age, input_size):
+    """Shared YOLO process: frames from every session are batched into one forward pass"""
+    from batching import DynamicBatcher, MAX_BATCH_SIZE
+    from detection import detect_mobile_objects_batch
+
+    batcher = DynamicBatcher(lambda frames: detect_mobile_objects_batch(frames, input_size), name="yolo-batcher")
+    # Cap frames held inside the batcher, so a slow model backs up into the bounded request queue
+    slots = threading.BoundedSemaphore(MAX_BATCH_SIZE * 2)
+    last_report = time.monotonic()
+
+    while True:
+        try:
+            task = requests.get(timeout=STATS_INTERVAL)
+        except queue.Empty:
+            task = ()
+        if task is None:
+            batcher.stop()
+            return
+
+        if task:
+            session_id, enqueued_at, kind, payload, shape = task
+            if time.time() - enqueued_at > max_frame_age:
+                results.put(("objects_stale", session_id, None))
+            else:
+                frame = _decode(kind, payload, shape)
+                if frame is None:
+                    results.put(("objects_error", session_id, "could not decode frame"))
+                else:
+                    slots.acquire()
+                    batcher.submit(frame).add_done_callback(
+                        partial(_route_objects, results, session_id, enqueued_at, slots))
+
+        now = time.monotonic()
+        if now - last_report >= STATS_INTERVAL:
+            results.put(("batch_stats", None, batcher.stats()))
+            last_report = now
+
+
+class SessionWorkerPool:
+    """Distributes frames from many candidate sessions over a pool of analysis processes.
+
+    Each session is pinned to one worker (crc32 of its id), so its tracker, timers and
+    known face live in exactly one place. Back-pressure is applied before a frame is
+    queued: a session may only have a couple of frames in flight, and each worker's
+    queue is bounded. Frames over either limit are dropped immediately rather than
+    queued behind work that is already late; the worker also skips frames that waited
+    longer than MAX_FRAME_AGE.
+
+    Object detection is shared: up to OBJECT_RATE_HZ frames per session go to a single
+    inference process that batches them across sessions (batching.py)."""
+
+    def __init__(self, num_workers=NUM_WORKERS, queue_size=WORKER_QUEUE_SIZE,
+                 max_in_flight=MAX_IN_FLIGHT_PER_SESSION, max_frame_age=MAX_FRAME_AGE,
+                 idle_timeout=SESSION_IDLE_TIMEOUT, object_detection=True, object_rate_hz=OBJECT_RATE_HZ,
+                 event_store=None):
+        self.num_workers = num_workers
+        self.event_store = event_store
+        self.max_in_flight = max_in_flight
+        self.object_interval = 1.0 / object_rate_hz
+        ctx = mp.get_context("spawn")  # the web server is multi-threaded; don't fork it
+        self._tasks = [ctx.Queue(maxsize=queue_size) for _ in range(num_workers)]
+        self._results = ctx.Queue()
+        self._workers = [
+            ctx.Process(target=_worker_main, name=f"proctor-worker-{i}", daemon=True,
+                        args=(i, self._tasks[i], self._results, max_frame_age, idle_timeout))
+            for i in range(num_workers)
+        ]
+        self._inference_requests = None
+        if object_detection:
+            self._inference_requests = ctx.Queue(maxsize=INFERENCE_QUEUE_SIZE)
+            self._workers.append(ctx.Process(target=_inference_main, name="proctor-yolo", daemon=True,
+                                             args=(self._inference_requests, self._results,
+                                                   max_frame_age, YOLO_INPUT_SIZE)))
+        self.inference_stats = {}
+        self._lock = threading.Lock()
+        self._in_flight = {}
+        self._sessions = {}
+        self._object_events = {}  # session_id -> EventEngine, so a phone held up is one incident
+        self._collector = threading.Thread(target=self._collect, name="proctor-results", daemon=True)
+        self.stats = {"submitted": 0, "processed": 0, "dropped_session_busy": 0,
+                      "dropped_worker_busy": 0, "stale": 0, "errors": 0,
+                      "objects_submitted": 0, "objects_processed": 0, "objects_skipped": 0}
+
+    def start(self):
+        for worker in self._workers:
+            worker.start()
+        self._collector.start()
+        return self
+
+    def stop(self):
+        for tasks in self._tasks + ([self._inference_requests] if self._inference_requests else []):
+            try:
+                tasks.put(None, timeout=1)
+            except queue.Full:
+                pass
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self._results.put(None)
+        self._collector.join(timeout=2)
+
+    def worker_for(self, session_id):
+        return zlib.crc32(session_id.encode("utf-8")) % self.num_workers
+
+    def _session(self, session_id):
+        state = self._sessions.get(session_id)
+        if state is None:
+            state = self._sessions[session_id] = {
+                "submitted": 0, "processed": 0, "dropped": 0, "stale": 0,
+                "events": {}, "latest": None, "objects": [], "worker": self.worker_for(session_id),
+                "last_object_submit": 0.0,
+            }
+        return state
+
+    def submit(self, session_id, payload, kind="jpeg", shape=None, timestamp=None, candidate=None):
+        """Queue one frame; returns (accepted, reason). Never blocks."""
+        with self._lock:
+            state = self._session(session_id)
+            state["submitted"] += 1
+            self.stats["submitted"] += 1
+            if self._in_flight.get(session_id, 0) >= self.max_in_flight:
+                state["dropped"] += 1
+                self.stats["dropped_session_busy"] += 1
+                return False, "session_busy"
+            self._in_flight[session_id] = self._in_flight.get(session_id, 0) + 1
+
+        enqueued_at = time.time()
+        task = ("frame", session_id, candidate, timestamp, enqueued_at, kind, payload, shape)
+        try:
+            self._tasks[self.worker_for(session_id)].put_nowait(task)
+        except queue.Full:
+            with self._lock:
+                self._in_flight[session_id] -= 1
+                state["dropped"] += 1
+                self.stats["dropped_worker_busy"] += 1
+            return False, "worker_busy"
+        self._submit_objects(session_id, state, enqueued_at, kind, payload, shape)
+        return True, "queued"
+
+    def _submit_objects(self, session_id, state, enqueued_at, kind, payload, shape):
+        """Forward a rate-limited subset of a session's frames to the shared YOLO process"""
+        if self._inference_requests is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if now - state["last_object_submit"] < self.object_interval:
+                return
+            state["last_object_submit"] = now
+        try:
+            self._inference_requests.put_nowait((session_id, enqueued_at, kind, payload, shape))
+            outcome = "objects_submitted"
+        except queue.Full:
+            outcome = "objects_skipped"
+        with self._lock:
+            self.stats[outcome] += 1
+
+    def close_session(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._in_flight.pop(session_id, None)
+            self._object_events.pop(session_id, None)
+        try:
+            self._tasks[self.worker_for(session_id)].put(("close", session_id), timeout=1)
+        except queue.Full:
+            pass  # the worker's idle sweep will drop it
+
+    def session_status(self, session_id):
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return None
+            return dict(state, events=dict(state["events"]), in_flight=self._in_flight.get(session_id, 0))
+
+    def pool_stats(self):
+        with self._lock:
+            return dict(self.stats, sessions=len(self._sessions), workers=self.num_workers,
+                        queue_depth=[self._queue_depth(q) for q in self._tasks],
+                        inference_queue_depth=self._queue_depth(self._inference_requests)
+                        if self._inference_requests else None,
+                        inference=self.inference_stats)
+
+    @staticmethod
+    def _queue_depth(tasks):
+        try:
+            return tasks.qsize()
+        except NotImplementedError:  # macOS
+            return None
+
+    def _collect(self):
+        while True:
+            message = self._results.get()
+            if message is None:
+                return
+            kind, session_id, result = message
+            if kind == "batch_stats":
+                self.inference_stats = result
+                continue
+            if kind.startswith("objects"):
+                self._collect_objects(kind, session_id, result)
+                continue
+            with self._lock:
+                if self._in_flight.get(session_id, 0) > 0:
+                    self._in_flight[session_id] -= 1
+                state = self._sessions.get(session_id)
+                if kind == "result":
+                    self.stats["processed"] += 1
+                elif kind == "stale":
+                    self.stats["stale"] += 1
+                else:
+                    self.stats["errors"] += 1
+                if state is None:
+                    continue  # session was closed while the frame was in flight
+                if kind == "result":
+                    state["processed"] += 1
+                    state["latest"] = result
+                    for event, _ in result["events"]:
+                        if not event.endswith(CLEARED_SUFFIX):
+                            state["events"][event] = state["events"].get(event, 0) + 1
+                elif kind == "stale":
+                    state["stale"] += 1
+            if kind == "result" and result["events"]:
+                self._record_events([(session_id, event, result["timestamp"], "", details)
+                                     for event, details in result["events"]])
+
+    def _record_events(self, rows):
+        if self.event_store is None:
+            return
+        try:
+            self.event_store.record_many(rows)
+        except Exception as e:
+            print(f"[Event Store Error] {e}")
+
+    def _collect_objects(self, kind, session_id, result):
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if kind != "objects":
+                return
+            self.stats["objects_processed"] += 1
+            if state is None:
+                return
+            state["objects"] = result["detections"]
+            phone = any(label.lower() == "cell phone" for label, _, _ in result["detections"])
+            events = self._object_events.setdefault(session_id, EventEngine())
+            now = time.time()
+            if events.update("mobile_detected", phone, now) != ONSET:
+                return
+            state["events"]["mobile_detected"] = state["events"].get("mobile_detected", 0) + 1
+        self._record_events([(session_id, "mobile_detected", now, "", "Phone detected")])
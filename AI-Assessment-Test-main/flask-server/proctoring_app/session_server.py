@@ -0,0 +1,87 @@
+# session_server.py
+"""
+Multi-session proctoring ingest server.
+
+Candidates' browsers (or load_generator.py) push frames per session; analysis runs
+on a pool of worker processes (session_pool.py), one session pinned per worker.
+
+    POST   /sessions/<session_id>/frames   body: JPEG (image/jpeg) or raw BGR bytes
+                                            (application/octet-stream + X-Frame-Width / X-Frame-Height)
+                                            optional X-Frame-Timestamp (unix seconds), X-Candidate (enrolled name)
+    GET    /sessions/<session_id>          latest result, event counts, drops
+    DELETE /sessions/<session_id>          end the session
+    GET    /stats                          pool-wide counters and queue depths
+    GET    /events, /events/sessions, /events/sessions/<session_id>/summary   (see event_api.py)
+
+Frames that cannot be taken right now get 429 and are dropped; clients should just
+send their next frame.
+"""
+import os
+
+from flask import Flask, request, jsonify
+
+from session_pool import SessionWorkerPool, NUM_WORKERS
+from event_store import EventStore, EVENT_DB
+from event_api import create_event_blueprint
+
+app = Flask(__name__)
+event_store = EventStore(os.getenv("EVENT_DB", EVENT_DB))
+app.register_blueprint(create_event_blueprint(event_store))
+pool = None
+
+
+def get_pool():
+    global pool
+    if pool is None:
+        pool = SessionWorkerPool(int(os.getenv("PROCTOR_WORKERS", NUM_WORKERS)), event_store=event_store).start()
+    return pool
+
+
+@app.route('/sessions/<session_id>/frames', methods=['POST'])
+def ingest_frame(session_id):
+    payload = request.get_data()
+    if not payload:
+        return jsonify({"error": "Empty frame"}), 400
+
+    if request.mimetype == "application/octet-stream":
+        try:
+            width = int(request.headers["X-Frame-Width"])
+            height = int(request.headers["X-Frame-Height"])
+        except (KeyError, ValueError):
+            return jsonify({"error": "Raw frames need X-Frame-Width and X-Frame-Height"}), 400
+        if len(payload) != width * height * 3:
+            return jsonify({"error": "Raw frame size does not match width x height x 3"}), 400
+        kind, shape = "raw", (height, width, 3)
+    else:
+        kind, shape = "jpeg", None
+
+    timestamp = request.headers.get("X-Frame-Timestamp", type=float)
+    accepted, reason = get_pool().submit(session_id, payload, kind, shape, timestamp,
+                                         request.headers.get("X-Candidate"))
+    if not accepted:
+        return jsonify({"accepted": False, "reason": reason}), 429
+    return jsonify({"accepted": True}), 202
+
+
+@app.route('/sessions/<session_id>', methods=['GET'])
+def session_status(session_id):
+    status = get_pool().session_status(session_id)
+    if status is None:
+        return jsonify({"error": "Unknown session"}), 404
+    return jsonify(status)
+
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+def end_session(session_id):
+    get_pool().close_session(session_id)
+    return jsonify({"closed": session_id})
+
+
+@app.route('/stats')
+def stats():
+    return jsonify(get_pool().pool_stats())
+
+
+if __name__ == '__main__':
+    get_pool()
+    app.run(host='0.0.0.0', port=5002, threaded=True)
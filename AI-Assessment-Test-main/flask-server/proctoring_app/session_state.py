@@ -0,0 +1,67 @@
+import time
+
+from detection import analyze_frame
+from tracking import FaceTracker, DETECT_EVERY, DETECT_SCALE
+from identity import IdentityVerifier
+from events import EventEngine, EVENT_RULES, ONSET, CLEARED
+
+# === SETTINGS ===
+LOOK_AWAY_THRESHOLD = 5  # seconds
+ABSENCE_THRESHOLD = 10   # seconds
+
+
+class ProctorSession:
+    """Analysis state for one candidate: face tracker, known face and the event state machines.
+
+    Event timing runs on the frame timestamps the client sends, so a session behaves the same
+    whether its frames arrive live or from a replayed recording."""
+
+    def __init__(self, session_id, gallery=None, candidate=None):
+        self.session_id = session_id
+        self.tracker = FaceTracker(DETECT_EVERY, DETECT_SCALE)
+        self.identity = IdentityVerifier(gallery, candidate)
+        self.events = EventEngine({
+            "no_face": dict(EVENT_RULES["no_face"], hold=ABSENCE_THRESHOLD),
+            "looking_away": dict(EVENT_RULES["looking_away"], hold=LOOK_AWAY_THRESHOLD),
+        })
+        self.last_seen = time.monotonic()
+        self.frames = 0
+
+    def process(self, frame, timestamp=None):
+        """Analyze one frame; returns the face count, gaze direction and any incidents that started or cleared"""
+        current_time = time.time() if timestamp is None else timestamp
+        self.last_seen = time.monotonic()
+        self.frames += 1
+
+        analysis = analyze_frame(frame, tracker=self.tracker)
+        face_count = analysis.face_count
+        events = []
+        direction = None
+
+        # Conditions go through the event engine: one event per incident, not one per frame
+        mismatch = False
+        if face_count == 1:
+            mismatch = self.identity.verify(frame, analysis.faces[0], self.tracker.generation) is False
+            direction = analysis.head_pose(0)
+
+        conditions = [
+            ("face_swap", mismatch, "Identity mismatch detected"),
+            ("no_face", face_count == 0, f"No face detected for {ABSENCE_THRESHOLD} seconds"),
+            ("multiple_faces", face_count > 1, "More than one face in frame"),
+            ("looking_away", direction not in (None, "Looking Forward"), f"User looking {direction}"),
+        ]
+        for event, condition, details in conditions:
+            transition = self.events.update(event, condition, current_time)
+            if transition == ONSET:
+                events.append((event, details))
+            elif transition == CLEARED:
+                events.append((f"{event}_cleared",
+                               f"Lasted {self.events.duration(event, current_time):.1f} seconds"))
+
+        return {
+            "session_id": self.session_id,
+            "timestamp": current_time,
+            "faces": face_count,
+            "direction": direction,
+            "events": events,
+        }
@@ -0,0 +1,123 @@
+import os
+import time
+from collections import deque
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+# === SETTINGS ===
+DEDUP_WINDOW = 60.0            # seconds a stored snapshot stays eligible as a near-duplicate target
+HASH_DISTANCE = 6              # max differing dHash bits (of 64) for two frames to count as the same
+ORIGINAL_QUALITY = 85          # JPEG quality for full-resolution originals
+THUMB_QUALITY = 60             # JPEG quality for reviewer thumbnails
+THUMB_WIDTH = 320
+SESSION_QUOTA_MB = 200         # disk budget per session (originals + thumbnails)
+
+
+def dhash(frame, size=8):
+    """64-bit difference hash: sign of horizontal gradients on a 9x8 grayscale thumbnail"""
+    gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class SnapshotStore:
+    """Per-session snapshot storage: <root>/<session>/originals and <root>/<session>/thumbs.
+
+    Each frame is perceptually hashed; a frame within HASH_DISTANCE bits of one stored
+    for the same event type in the last DEDUP_WINDOW seconds is not written again and
+    links to the existing file instead. Windows are kept per event type, so a new
+    violation never points at an earlier file taken for a different one. Originals and thumbnails are encoded separately at their own JPEG quality.
+    Once the session's quota is used up only thumbnails are kept, and when even those
+    no longer fit the snapshot is skipped."""
+
+    def __init__(self, root, session_id="local", dedup_window=DEDUP_WINDOW, max_distance=HASH_DISTANCE,
+                 original_quality=ORIGINAL_QUALITY, thumb_quality=THUMB_QUALITY, thumb_width=THUMB_WIDTH,
+                 quota_mb=SESSION_QUOTA_MB):
+        self.session_dir = os.path.join(root, session_id)
+        self.originals_dir = os.path.join(self.session_dir, "originals")
+        self.thumbs_dir = os.path.join(self.session_dir, "thumbs")
+        os.makedirs(self.originals_dir, exist_ok=True)
+        os.makedirs(self.thumbs_dir, exist_ok=True)
+        self.dedup_window = dedup_window
+        self.max_distance = max_distance
+        self.original_params = [cv2.IMWRITE_JPEG_QUALITY, original_quality]
+        self.thumb_params = [cv2.IMWRITE_JPEG_QUALITY, thumb_quality]
+        self.thumb_width = thumb_width
+        self.quota_bytes = int(quota_mb * 1024 * 1024)
+        self.used_bytes = self._scan_usage()
+        self._recent = {}  # event -> deque of (ts, hash, original path or thumbnail path)
+        self.stats = {"saved": 0, "duplicates": 0, "thumbnail_only": 0, "over_quota": 0}
+
+    def _scan_usage(self):
+        total = 0
+        for directory in (self.originals_dir, self.thumbs_dir):
+            for entry in os.scandir(directory):
+                if entry.is_file():
+                    total += entry.stat().st_size
+        return total
+
+    def _find_duplicate(self, event, frame_hash, ts):
+        recent = self._recent.get(event)
+        if not recent:
+            return None
+        while recent and ts - recent[0][0] > self.dedup_window:
+            recent.popleft()
+        for _, stored_hash, path in reversed(recent):
+            if hamming(frame_hash, stored_hash) <= self.max_distance:
+                return path
+        return None
+
+    def save(self, frame, event, ts=None):
+        """Store a snapshot. Returns (path, note): the file to reference (a new original, an
+        existing near-duplicate, or a thumbnail when over quota) and a note for the log, or
+        (None, note) when nothing could be stored."""
+        ts = time.time() if ts is None else ts
+        frame_hash = dhash(frame)
+        duplicate = self._find_duplicate(event, frame_hash, ts)
+        if duplicate is not None:
+            self.stats["duplicates"] += 1
+            return duplicate, "duplicate"
+
+        stamp = datetime.fromtimestamp(ts)
+        name = f"{event}_{stamp.strftime('%Y-%m-%d_%H-%M-%S')}_{stamp.microsecond // 1000:03d}.jpg"
+
+        height, width = frame.shape[:2]
+        thumb = frame
+        if width > self.thumb_width:
+            thumb = cv2.resize(frame, (self.thumb_width, int(height * self.thumb_width / width)),
+                               interpolation=cv2.INTER_AREA)
+        thumb_bytes = cv2.imencode('.jpg', thumb, self.thumb_params)[1].tobytes()
+        original_bytes = cv2.imencode('.jpg', frame, self.original_params)[1].tobytes()
+
+        thumb_path = os.path.join(self.thumbs_dir, name)
+        original_path = os.path.join(self.originals_dir, name)
+        if self.used_bytes + len(original_bytes) + len(thumb_bytes) <= self.quota_bytes:
+            self._write(original_path, original_bytes)
+            self._write(thumb_path, thumb_bytes)
+            path, note = original_path, ""
+            self.stats["saved"] += 1
+        elif self.used_bytes + len(thumb_bytes) <= self.quota_bytes:
+            self._write(thumb_path, thumb_bytes)
+            path, note = thumb_path, "thumbnail only, session quota reached"
+            self.stats["thumbnail_only"] += 1
+        else:
+            self.stats["over_quota"] += 1
+            return None, "session quota reached"
+
+        self._recent.setdefault(event, deque()).append((ts, frame_hash, path))
+        return path, note
+
+    def _write(self, path, data):
+        with open(path, 'wb') as f:
+            f.write(data)
+        self.used_bytes += len(data)
+
+    def thumbnail_for(self, original_path):
+        return os.path.join(self.thumbs_dir, os.path.basename(original_path))
@@ -0,0 +1,75 @@
+import cv2
+import dlib
+
+from detection import get_face_detector
+
+# === SETTINGS ===
+DETECT_EVERY = 5             # run full HOG detection every N frames
+DETECT_SCALE = 0.5           # detect on a frame downscaled by this factor
+MIN_TRACK_CONFIDENCE = 7.0   # correlation tracker PSR below which we re-detect immediately
+DETECT_UPSAMPLE = 1          # HOG upsampling on the small frame; 1 at scale 0.5 keeps the full-frame minimum face size (~80 px)
+
+
+class FaceTracker:
+    """Detect-then-track: HOG detection on a downscaled frame every N frames,
+    dlib correlation trackers in between, early re-detection when a tracker loses confidence"""
+
+    def __init__(self, detect_every=DETECT_EVERY, scale=DETECT_SCALE,
+                 min_confidence=MIN_TRACK_CONFIDENCE, upsample=DETECT_UPSAMPLE):
+        self.detect_every = max(1, detect_every)
+        self.scale = scale
+        self.min_confidence = min_confidence
+        self.upsample = upsample
+        self.trackers = []
+        self.frames_since_detection = self.detect_every  # forces a detection on the first frame
+        self.generation = 0  # bumped whenever tracks are lost/restarted, so per-face caches know to refresh
+        self.stats = {"frames": 0, "detections": 0, "tracked_frames": 0, "low_confidence_redetections": 0}
+
+    def reset(self):
+        self.trackers = []
+        self.frames_since_detection = self.detect_every
+        self.generation += 1
+
+    def detect(self, gray):
+        if self.scale < 1:
+            small = cv2.resize(gray, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+            rects = get_face_detector()(small, self.upsample)
+            inv = 1.0 / self.scale
+            return [dlib.rectangle(int(r.left() * inv), int(r.top() * inv), int(r.right() * inv), int(r.bottom() * inv))
+                    for r in rects]
+        return list(get_face_detector()(gray, self.upsample))
+
+    def _start_tracking(self, gray, faces):
+        self.trackers = []
+        for face in faces:
+            tracker = dlib.correlation_tracker()
+            tracker.start_track(gray, face)
+            self.trackers.append(tracker)
+        self.frames_since_detection = 0
+
+    def update(self, gray):
+        """Face rectangles (full-resolution coordinates) for this grayscale frame"""
+        self.stats["frames"] += 1
+        self.frames_since_detection += 1
+
+        if self.trackers and self.frames_since_detection < self.detect_every:
+            confidences = [tracker.update(gray) for tracker in self.trackers]
+            if min(confidences) >= self.min_confidence:
+                self.stats["tracked_frames"] += 1
+                return [self._to_rect(tracker.get_position()) for tracker in self.trackers]
+            self.stats["low_confidence_redetections"] += 1
+            self.generation += 1
+        elif not self.trackers and self.frames_since_detection < self.detect_every:
+            # Nobody was in frame at the last detection; keep reporting that until the next one
+            return []
+
+        faces = self.detect(gray)
+        self.stats["detections"] += 1
+        if len(faces) != len(self.trackers):
+            self.generation += 1
+        self._start_tracking(gray, faces)
+        return faces
+
+    @staticmethod
+    def _to_rect(position):
+        return dlib.rectangle(int(position.left()), int(position.top()), int(position.right()), int(position.bottom()))
@@ -0,0 +1,94 @@
+# tracking_report.py
+"""
+Accuracy / FPS report for detect-then-track face detection.
+
+Runs full-resolution HOG detection on every frame of a video as the reference,
+then replays the same frames through FaceTracker for each cadence/scale setting
+and reports face-stage FPS, face-count agreement and mean IoU to the reference.
+
+    python tracking_report.py exam_recording.mp4 --detect-every 1 3 5 10 --scale 1.0 0.5 0.33
+"""
+import argparse
+import time
+
+import cv2
+
+from detection import get_face_detector
+from tracking import FaceTracker
+
+
+def load_gray_frames(path, max_frames):
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while len(frames) < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+    cap.release()
+    return frames
+
+
+def iou(a, b):
+    left, top = max(a.left(), b.left()), max(a.top(), b.top())
+    right, bottom = min(a.right(), b.right()), min(a.bottom(), b.bottom())
+    inter = max(0, right - left) * max(0, bottom - top)
+    union = a.width() * a.height() + b.width() * b.height() - inter
+    return inter / union if union else 0.0
+
+
+def best_iou(face, reference_faces):
+    return max((iou(face, ref) for ref in reference_faces), default=0.0)
+
+
+def run_config(frames, reference, detect_every, scale):
+    tracker = FaceTracker(detect_every=detect_every, scale=scale)
+    count_matches, ious = 0, []
+    start = time.perf_counter()
+    results = [tracker.update(gray) for gray in frames]
+    elapsed = time.perf_counter() - start
+
+    for faces, ref_faces in zip(results, reference):
+        if len(faces) == len(ref_faces):
+            count_matches += 1
+        ious.extend(best_iou(face, ref_faces) for face in faces if ref_faces)
+
+    return {
+        "detect_every": detect_every,
+        "scale": scale,
+        "fps": len(frames) / elapsed if elapsed else float("inf"),
+        "count_agreement": count_matches / len(frames),
+        "mean_iou": sum(ious) / len(ious) if ious else float("nan"),
+        "detections": tracker.stats["detections"],
+        "redetections": tracker.stats["low_confidence_redetections"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Detect-then-track accuracy/FPS report")
+    parser.add_argument("video")
+    parser.add_argument("--detect-every", type=int, nargs="+", default=[1, 3, 5, 10])
+    parser.add_argument("--scale", type=float, nargs="+", default=[1.0, 0.5])
+    parser.add_argument("--max-frames", type=int, default=600)
+    args = parser.parse_args()
+
+    frames = load_gray_frames(args.video, args.max_frames)
+    if not frames:
+        raise SystemExit(f"No frames read from {args.video}")
+
+    start = time.perf_counter()
+    detector = get_face_detector()
+    reference = [list(detector(gray)) for gray in frames]
+    baseline_fps = len(frames) / (time.perf_counter() - start)
+    print(f"Reference: full-resolution detection on every frame, {len(frames)} frames, {baseline_fps:.1f} FPS\n")
+
+    print(f"{'every':>5} {'scale':>6} {'FPS':>8} {'speedup':>8} {'count agr':>10} {'mean IoU':>9} {'detects':>8} {'re-det':>7}")
+    for detect_every in args.detect_every:
+        for scale in args.scale:
+            r = run_config(frames, reference, detect_every, scale)
+            print(f"{r['detect_every']:>5} {r['scale']:>6.2f} {r['fps']:>8.1f} {r['fps'] / baseline_fps:>7.1f}x "
+                  f"{r['count_agreement']:>9.1%} {r['mean_iou']:>9.3f} {r['detections']:>8} {r['redetections']:>7}")
+
+
+if __name__ == "__main__":
+    main()
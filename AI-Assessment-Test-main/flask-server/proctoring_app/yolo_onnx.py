@@ -0,0 +1,116 @@
+import cv2
+import numpy as np
+
+# COCO class names in YOLOv5 order
+COCO_NAMES = [
+    "person", "bicycle", "car", "motorcycle", "airplane", "bus", "train", "truck", "boat", "traffic light",
+    "fire hydrant", "stop sign", "parking meter", "bench", "bird", "cat", "dog", "horse", "sheep", "cow",
+    "elephant", "bear", "zebra", "giraffe", "backpack", "umbrella", "handbag", "tie", "suitcase", "frisbee",
+    "skis", "snowboard", "sports ball", "kite", "baseball bat", "baseball glove", "skateboard", "surfboard",
+    "tennis racket", "bottle", "wine glass", "cup", "fork", "knife", "spoon", "bowl", "banana", "apple",
+    "sandwich", "orange", "broccoli", "carrot", "hot dog", "pizza", "donut", "cake", "chair", "couch",
+    "potted plant", "bed", "dining table", "toilet", "tv", "laptop", "mouse", "remote", "keyboard",
+    "cell phone", "microwave", "oven", "toaster", "sink", "refrigerator", "book", "clock", "vase", "scissors",
+    "teddy bear", "hair drier", "toothbrush",
+]
+CONF_THRESHOLD = 0.25
+IOU_THRESHOLD = 0.45
+STRIDE = 32   # YOLOv5 input sides must be multiples of the largest stride
+
+
+class OnnxYolo:
+    """YOLOv5 exported to ONNX (`python export.py --weights yolov5s.pt --include onnx`), run
+    through OpenCV DNN or ONNX Runtime, so neither torch nor network access is needed.
+
+    detect() mirrors the torch hub model's results.xyxy: one (N, 6) array of
+    x1, y1, x2, y2, confidence, class per input frame, in that frame's coordinates.
+
+    The requested input size is used when the export has dynamic spatial axes
+    (`--dynamic`, ONNX Runtime only). Static exports, and anything run through OpenCV DNN,
+    only accept the size they were exported at; a different request is reported once
+    and the export's size is used."""
+
+    def __init__(self, path, backend="opencv", input_size=640, conf_threshold=CONF_THRESHOLD,
+                 iou_threshold=IOU_THRESHOLD, names=COCO_NAMES):
+        self.path = path
+        self.backend = backend
+        self.input_size = input_size
+        self.fixed_size = input_size   # None when the export accepts any (stride-aligned) size
+        self._size_warned = set()
+        self.conf_threshold = conf_threshold
+        self.iou_threshold = iou_threshold
+        self.names = dict(enumerate(names))
+        if backend == "onnxruntime":
+            import onnxruntime as ort
+
+            self._session = ort.InferenceSession(path, providers=["CPUExecutionProvider"])
+            model_input = self._session.get_inputs()[0]
+            self._input_name = model_input.name
+            self.dynamic_batch = not isinstance(model_input.shape[0], int)
+            if isinstance(model_input.shape[2], int):
+                self.input_size = self.fixed_size = model_input.shape[2]
+            else:
+                self.fixed_size = None
+        else:
+            self._net = cv2.dnn.readNetFromONNX(path)
+            self.dynamic_batch = False
+
+    def _input_size(self, size):
+        """Side length to run at for a requested size (None = the default input_size)"""
+        if not size:
+            return self.input_size
+        if self.fixed_size is None:
+            return max(STRIDE, int(np.ceil(size / STRIDE)) * STRIDE)
+        if size != self.fixed_size and size not in self._size_warned:
+            self._size_warned.add(size)
+            print(f"[YOLO Warning] {self.path} only accepts {self.fixed_size}px input; running at "
+                  f"{self.fixed_size} instead of {size} (re-export with --imgsz {size} or --dynamic)")
+        return self.fixed_size
+
+    def _letterbox(self, frame, size):
+        """Resize keeping aspect ratio and pad to size x size"""
+        height, width = frame.shape[:2]
+        scale = size / max(height, width)
+        new_w, new_h = int(round(width * scale)), int(round(height * scale))
+        resized = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+        pad_x, pad_y = (size - new_w) // 2, (size - new_h) // 2
+        canvas = np.full((size, size, 3), 114, dtype=np.uint8)
+        canvas[pad_y:pad_y + new_h, pad_x:pad_x + new_w] = resized
+        return canvas, scale, pad_x, pad_y
+
+    def _forward(self, blob):
+        if self.backend == "onnxruntime":
+            return self._session.run(None, {self._input_name: blob})[0]
+        self._net.setInput(blob)
+        return self._net.forward()
+
+    def detect(self, frames, size=None):
+        """Detections for a list of BGR frames at `size` (see class docstring), batched in one
+        run when the export allows it"""
+        size = self._input_size(size)
+        letterboxed = [self._letterbox(frame, size) for frame in frames]
+        images = [canvas for canvas, _, _, _ in letterboxed]
+        if self.dynamic_batch:
+            outputs = self._forward(cv2.dnn.blobFromImages(images, 1 / 255.0, swapRB=True))
+        else:
+            outputs = [self._forward(cv2.dnn.blobFromImage(image, 1 / 255.0, swapRB=True))[0] for image in images]
+        return [self._postprocess(output, *meta[1:]) for output, meta in zip(outputs, letterboxed)]
+
+    def _postprocess(self, output, scale, pad_x, pad_y):
+        output = output.reshape(-1, output.shape[-1])
+        scores = output[:, 4:5] * output[:, 5:]  # objectness x class probability
+        classes = scores.argmax(axis=1)
+        confidences = scores[np.arange(len(scores)), classes]
+        keep = confidences >= self.conf_threshold
+        if not keep.any():
+            return np.zeros((0, 6), dtype=np.float32)
+        boxes, confidences, classes = output[keep, :4], confidences[keep], classes[keep]
+
+        # cx, cy, w, h on the letterboxed image -> x1, y1, x2, y2 on the original frame
+        x1 = (boxes[:, 0] - boxes[:, 2] / 2 - pad_x) / scale
+        y1 = (boxes[:, 1] - boxes[:, 3] / 2 - pad_y) / scale
+        w, h = boxes[:, 2] / scale, boxes[:, 3] / scale
+        indices = cv2.dnn.NMSBoxesBatched(np.stack([x1, y1, w, h], axis=1).tolist(), confidences.tolist(),
+                                          classes.tolist(), self.conf_threshold, self.iou_threshold)
+        indices = np.array(indices, dtype=int).reshape(-1)
+        return np.stack([x1, y1, x1 + w, y1 + h, confidences, classes], axis=1)[indices].astype(np.float32)
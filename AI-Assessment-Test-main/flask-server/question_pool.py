@@ -0,0 +1,248 @@
+import hashlib
+import logging
+import random
+import threading
+import time
+import concurrent.futures
+from collections import OrderedDict
+
+from text_normalize import normalize_words
+
+# 🧠 Question pool: accumulates every generated question per topic/type/difficulty
+# so retakes can be served fresh questions without another Gemini call.
+
+SHINGLE_SIZE = 3           # words per shingle
+CHAR_SHINGLE_SIZE = 3      # characters per shingle for questions with too few words (e.g. Chinese, Japanese)
+DUPLICATE_SIMILARITY = 0.8  # Jaccard similarity above which two questions are "the same"
+LOW_WATER_MARK = 10        # top up when a user has fewer unseen questions than this
+REFILL_SIZE = 10           # questions requested per background top-up
+MAX_BUCKET_SIZE = 300      # hard cap per topic/type/difficulty bucket
+MAX_BUCKETS = 200          # least recently used topics are dropped beyond this
+MAX_USERS_PER_BUCKET = 1000  # least recently active users' "seen" sets are dropped beyond this
+BUCKET_TTL = 6 * 3600      # seconds a topic may sit unused before it is dropped
+SEEN_TTL = 24 * 3600       # seconds a user's "seen" set survives without activity
+SWEEP_INTERVAL = 60        # seconds between TTL sweeps (done inline, on add)
+
+
+class TemplateQuestion(dict):
+    """A canned template question (upstream unavailable). Serializes like any question
+    but is never pooled, so retakes are not served templates as "fresh" questions."""
+
+
+def _normalize_question(text):
+    return " ".join(normalize_words(text))
+
+
+def question_fingerprint(text):
+    """Exact-duplicate fingerprint of a question text (case/punctuation insensitive)"""
+    return hashlib.sha1(_normalize_question(text).encode("utf-8")).hexdigest()
+
+
+def question_shingles(text, size=SHINGLE_SIZE):
+    """Set of word shingles used for near-duplicate detection"""
+    words = _normalize_question(text).split()
+    if len(words) > size:
+        return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+    # Too few words to shingle: very short questions, or scripts written without spaces;
+    # character shingles still tell near-duplicates from different questions
+    joined = " ".join(words)
+    if len(joined) <= CHAR_SHINGLE_SIZE:
+        return {joined}
+    return {joined[i:i + CHAR_SHINGLE_SIZE] for i in range(len(joined) - CHAR_SHINGLE_SIZE + 1)}
+
+
+class _Bucket:
+    def __init__(self, text, q_type, difficulty):
+        self.text = text
+        self.q_type = q_type
+        self.difficulty = difficulty
+        self.questions = {}        # fingerprint -> question dict
+        self.shingles = {}         # fingerprint -> shingle set
+        self.shingle_index = {}    # shingle -> set of fingerprints
+        self.seen = OrderedDict()  # user_id -> set of fingerprints, least recently active first
+        self.seen_at = {}          # user_id -> last activity (monotonic)
+        self.used_at = time.monotonic()
+
+    def seen_by(self, user_id, now):
+        """The user's seen set, created if needed and marked as just used"""
+        seen = self.seen.get(user_id)
+        if seen is None:
+            seen = self.seen[user_id] = set()
+        else:
+            self.seen.move_to_end(user_id)
+        self.seen_at[user_id] = now
+        return seen
+
+    def evict_users(self, now, seen_ttl, max_users):
+        while self.seen:
+            user_id = next(iter(self.seen))
+            if len(self.seen) <= max_users and now - self.seen_at[user_id] < seen_ttl:
+                break
+            del self.seen[user_id]
+            del self.seen_at[user_id]
+
+
+class QuestionPool:
+    """Deduplicated per-topic question pool with per-user "seen" tracking.
+
+    Topics are kept in LRU order and capped at max_buckets; topics unused for bucket_ttl
+    and users inactive for seen_ttl are swept out, so memory stays bounded however many
+    distinct topics and users arrive."""
+
+    def __init__(self, refill, low_water=LOW_WATER_MARK, refill_size=REFILL_SIZE,
+                 similarity=DUPLICATE_SIMILARITY, max_bucket_size=MAX_BUCKET_SIZE,
+                 max_buckets=MAX_BUCKETS, max_users=MAX_USERS_PER_BUCKET,
+                 bucket_ttl=BUCKET_TTL, seen_ttl=SEEN_TTL):
+        # refill(text, q_type, difficulty, num_questions) -> list of question dicts
+        self.refill = refill
+        self.low_water = low_water
+        self.refill_size = refill_size
+        self.similarity = similarity
+        self.max_bucket_size = max_bucket_size
+        self.max_buckets = max_buckets
+        self.max_users = max_users
+        self.bucket_ttl = bucket_ttl
+        self.seen_ttl = seen_ttl
+        self._buckets = OrderedDict()   # key -> _Bucket, least recently used first
+        self._next_sweep = 0.0
+        self._refilling = set()
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=2, thread_name_prefix="pool-refill")
+
+    def _get(self, key):
+        """Existing bucket for key, marked as just used (caller holds the lock)"""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            self._buckets.move_to_end(key)
+            bucket.used_at = time.monotonic()
+        return bucket
+
+    def _bucket(self, key, text, q_type, difficulty):
+        bucket = self._get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(text, q_type, difficulty)
+        return bucket
+
+    def _evict(self):
+        """Drop excess buckets, and (every SWEEP_INTERVAL) idle buckets and users; caller holds the lock"""
+        now = time.monotonic()
+        while len(self._buckets) > self.max_buckets:
+            self._buckets.popitem(last=False)
+        if now < self._next_sweep:
+            return
+        self._next_sweep = now + SWEEP_INTERVAL
+        for key in [k for k, b in self._buckets.items() if now - b.used_at >= self.bucket_ttl]:
+            if key not in self._refilling:
+                del self._buckets[key]
+        for bucket in self._buckets.values():
+            bucket.evict_users(now, self.seen_ttl, self.max_users)
+
+    def _seen(self, bucket, user_id):
+        now = time.monotonic()
+        seen = bucket.seen_by(user_id, now)
+        bucket.evict_users(now, self.seen_ttl, self.max_users)
+        return seen
+
+    def _find_duplicate(self, bucket, fingerprint, shingles):
+        if fingerprint in bucket.questions:
+            return fingerprint
+        candidates = set()
+        for shingle in shingles:
+            candidates.update(bucket.shingle_index.get(shingle, ()))
+        for candidate in candidates:
+            other = bucket.shingles[candidate]
+            overlap = len(shingles & other) / len(shingles | other)
+            if overlap >= self.similarity:
+                return candidate
+        return None
+
+    def add(self, key, text, q_type, difficulty, questions):
+        """Add questions to the pool. Returns the fingerprints they were stored (or deduplicated) under."""
+        fingerprints = []
+        questions = [q for q in questions if not isinstance(q, TemplateQuestion)]
+        if not questions:
+            return fingerprints
+        with self._lock:
+            bucket = self._bucket(key, text, q_type, difficulty)
+            self._evict()
+            for question in questions:
+                question_text = question.get("question", "")
+                if not question_text:
+                    continue
+                fingerprint = question_fingerprint(question_text)
+                shingles = question_shingles(question_text)
+                duplicate = self._find_duplicate(bucket, fingerprint, shingles)
+                if duplicate is not None:
+                    fingerprints.append(duplicate)
+                    continue
+                if len(bucket.questions) >= self.max_bucket_size:
+                    continue
+                bucket.questions[fingerprint] = question
+                bucket.shingles[fingerprint] = shingles
+                for shingle in shingles:
+                    bucket.shingle_index.setdefault(shingle, set()).add(fingerprint)
+                fingerprints.append(fingerprint)
+        return fingerprints
+
+    def mark_seen(self, key, user_id, fingerprints):
+        with self._lock:
+            bucket = self._get(key)
+            if bucket is not None:
+                self._seen(bucket, user_id).update(fingerprints)
+
+    def unseen_count(self, key, user_id):
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return 0
+            return len(bucket.questions.keys() - bucket.seen.get(user_id, set()))
+
+    def sample(self, key, user_id, num_questions):
+        """Return num_questions the user has not seen yet (and mark them seen), or None if the pool is short"""
+        with self._lock:
+            bucket = self._get(key)
+            if bucket is None:
+                return None
+            seen = self._seen(bucket, user_id)
+            unseen = [fp for fp in bucket.questions if fp not in seen]
+            if len(unseen) < num_questions:
+                return None
+            chosen = random.sample(unseen, num_questions)
+            seen.update(chosen)
+            return [bucket.questions[fp] for fp in chosen]
+
+    def top_up_if_low(self, key, user_id):
+        """Schedule a background refill when this user is running out of unseen questions"""
+        if self.unseen_count(key, user_id) >= self.low_water:
+            return False
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None or key in self._refilling or len(bucket.questions) >= self.max_bucket_size:
+                return False
+            self._refilling.add(key)
+        self._executor.submit(self._refill, key, bucket)
+        return True
+
+    def _refill(self, key, bucket):
+        try:
+            questions = self.refill(bucket.text, bucket.q_type, bucket.difficulty, self.refill_size)
+            fingerprints = self.add(key, bucket.text, bucket.q_type, bucket.difficulty, questions or [])
+            logging.info(f"🧠 Pool top-up for '{bucket.text}': {len(fingerprints)} questions received")
+        except Exception as e:
+            logging.error(f"Pool top-up failed for '{bucket.text}': {e}")
+        finally:
+            with self._lock:
+                self._refilling.discard(key)
+
+    def clear(self):
+        with self._lock:
+            self._buckets = OrderedDict()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "buckets": len(self._buckets),
+                "users_tracked": sum(len(b.seen) for b in self._buckets.values()),
+                "questions": sum(len(b.questions) for b in self._buckets.values()),
+                "refills_in_flight": len(self._refilling),
+            }
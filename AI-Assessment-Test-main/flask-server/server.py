@@ -2,21 +2,28 @@ import time
 import random
 import logging
 import os
-import asyncio
 import concurrent.futures
 import json
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
 from dotenv import load_dotenv
 import google.generativeai as genai
+from question_pool import QuestionPool, TemplateQuestion
+from text_normalize import normalize_topic
+from upstream import UpstreamClient, UpstreamUnavailable
+from attempt_store import create_attempt_store
+from encoded_payload import EncodedPayload
+import metrics
 
-user_attempts = {}  # { "user_id": attempt_count }
 MAX_ATTEMPTS = 3
 
 # Load environment variables from .env file
 load_dotenv()
 
+# 🔒 { "user_id": attempt_count }, safe across threads and gunicorn workers
+attempt_store = create_attempt_store()
+
 app = Flask(__name__)
 CORS(app)
 
@@ -31,10 +38,21 @@ if not GENAI_API_KEY:
 genai.configure(api_key=GENAI_API_KEY)
 model = genai.GenerativeModel("gemini-2.0-flash-lite")
 
+# 🛡️ All Gemini calls share one rate limiter / circuit breaker / concurrency limit
+upstream = UpstreamClient(model)
+
 # 🚀 Performance: In-memory cache for generated questions
 question_cache = {}
 CACHE_EXPIRY = timedelta(hours=1)  # Cache expires after 1 hour
 
+# 🧠 Deduplicated question pool: serves retakes fresh questions without new LLM calls
+question_pool = QuestionPool(refill=lambda *args: generate_batch_questions(*args))
+
+# ⚡ Bounded pool for concurrent single-question fallback calls
+FALLBACK_WORKERS = 8
+FALLBACK_DEADLINE = 6  # seconds for the whole fallback batch, however many questions
+fallback_executor = concurrent.futures.ThreadPoolExecutor(max_workers=FALLBACK_WORKERS, thread_name_prefix="fallback")
+
 # 🎨 Creative fallback messages
 CREATIVE_ERROR_MESSAGES = [
     "🤖 The quiz bot got sleepy. Some questions are still cooking.",
@@ -46,10 +64,9 @@ CREATIVE_ERROR_MESSAGES = [
 ]
 
 # 🚀 Performance: Optimized batch question generator
-def generate_batch_questions(text, q_type, difficulty, num_questions):
-    """Generate multiple questions in a single API call for better performance"""
-    # 🚀 Simplified prompt for faster generation
-    prompt = f"""Generate {num_questions} multiple choice questions about {text}.
+def build_batch_prompt(text, difficulty, num_questions):
+    """Simplified prompt for faster generation"""
+    return f"""Generate {num_questions} multiple choice questions about {text}.
 
 Topic: {text}
 Difficulty: {difficulty}
@@ -71,28 +88,30 @@ D) Option 4
 ANSWER: B
 
 Continue for Q{num_questions}. Keep questions short and practical."""
-    
+
+def batch_generation_config():
+    # 🚀 Performance: Add timeout and shorter generation
+    return genai.types.GenerationConfig(
+        max_output_tokens=2000,  # Limit output length
+        temperature=0.3,  # Less randomness = faster
+    )
+
+def parse_batch_output(raw_output, num_questions):
+    """Parse the structured format directly, falling back to line-by-line parsing"""
+    logging.info(f"Raw AI output length: {len(raw_output)} chars")
+
+    questions = parse_structured_format(raw_output, num_questions)
+    if len(questions) > 0:
+        return questions
+    return parse_fallback_format(raw_output, num_questions)
+
+def generate_batch_questions(text, q_type, difficulty, num_questions):
+    """Generate multiple questions in a single API call for better performance"""
+    prompt = build_batch_prompt(text, difficulty, num_questions)
     try:
-        # 🚀 Performance: Add timeout and shorter generation
-        response = model.generate_content(
-            prompt,
-            generation_config=genai.types.GenerationConfig(
-                max_output_tokens=2000,  # Limit output length
-                temperature=0.3,  # Less randomness = faster
-            )
-        )
+        response = upstream.generate_content(prompt, generation_config=batch_generation_config())
         raw_output = response.text.strip()
-        
-        logging.info(f"Raw AI output length: {len(raw_output)} chars")
-        
-        # Parse the structured format directly
-        questions = parse_structured_format(raw_output, num_questions)
-        
-        if len(questions) > 0:
-            return questions
-        else:
-            # Fallback: Parse line by line
-            return parse_fallback_format(raw_output, num_questions)
+        return parse_batch_output(raw_output, num_questions)
             
     except json.JSONDecodeError as e:
         logging.warning(f"Failed to parse JSON: {e}, trying fallback parsing...")
@@ -149,14 +168,11 @@ def parse_structured_format(raw_output, num_questions):
         })
     
     logging.info(f"Parsed {len(questions)} questions from structured format")
+    metrics.PARSE_RESULTS.inc(parser="structured", result="success" if questions else "empty")
     return questions[:num_questions]
 
-def generate_fallback_questions(text, q_type, difficulty, num_questions):
-    """Generate questions one by one as fallback"""
-    questions = []
-    keyword = highlight_keyword(text)
-    
-    # 🚀 Performance: Create instant fallback questions first
+def template_question(text, keyword, index):
+    """Instant template question used when the upstream API can't serve us"""
     fallback_templates = [
         f"What is a key concept in {text}?",
         f"Which statement about {text} is correct?",
@@ -164,25 +180,42 @@ def generate_fallback_questions(text, q_type, difficulty, num_questions):
         f"How does {text} work?",
         f"What are the benefits of {text}?"
     ]
-    
-    for i in range(min(num_questions, 5)):  # Limit to 5 to avoid long waits
-        question = retry_generate_question(text, keyword, q_type, difficulty, retries=1)  # Reduce retries
-        if question:
-            questions.append(question)
-        else:
-            # Create a smart fallback question
-            template = fallback_templates[i % len(fallback_templates)]
-            questions.append({
-                "question": template,
-                "options": [
-                    f"Primary {keyword} functionality",
-                    f"Secondary {keyword} feature", 
-                    f"Alternative {keyword} approach",
-                    f"Optional {keyword} component"
-                ],
-                "answer": "A"
-            })
-    
+    return TemplateQuestion({
+        "question": fallback_templates[index % len(fallback_templates)],
+        "options": [
+            f"Primary {keyword} functionality",
+            f"Secondary {keyword} feature",
+            f"Alternative {keyword} approach",
+            f"Optional {keyword} component"
+        ],
+        "answer": "A"
+    })
+
+def generate_fallback_questions(text, q_type, difficulty, num_questions):
+    """Generate questions concurrently as fallback, bounded by one overall deadline"""
+    keyword = highlight_keyword(text)
+    num_questions = min(num_questions, 10)
+    metrics.generation_path.set("fallback")
+
+    # 🛡️ Fail fast to templates while the circuit is open or we're out of rate budget
+    if not upstream.available():
+        return [template_question(text, keyword, i) for i in range(num_questions)]
+
+    # ⚡ Fire all single-question calls at once; slots that miss the deadline get templates
+    futures = [
+        fallback_executor.submit(retry_generate_question, text, keyword, q_type, difficulty, retries=1)
+        for _ in range(num_questions)
+    ]
+    done, not_done = concurrent.futures.wait(futures, timeout=FALLBACK_DEADLINE)
+    for future in not_done:
+        future.cancel()
+    if not_done:
+        logging.warning(f"⏱️ {len(not_done)} fallback questions missed the {FALLBACK_DEADLINE}s deadline")
+
+    questions = []
+    for i, future in enumerate(futures):
+        question = future.result() if future in done and future.exception() is None else None
+        questions.append(question or template_question(text, keyword, i))
     return questions
 
 def parse_fallback_format(raw_output, num_questions):
@@ -218,12 +251,13 @@ def parse_fallback_format(raw_output, num_questions):
             "answer": "A",
             "explanation": ""
         })
-    
+
+    metrics.PARSE_RESULTS.inc(parser="fallback", result="success" if questions else "empty")
     return questions[:num_questions]
 
 # 🔁 Single question generator with retry (kept for backward compatibility)
-def generate_question(text, keyword, q_type, difficulty):
-    prompt = f"""
+def build_single_prompt(text, keyword, q_type, difficulty):
+    return f"""
     Generate a {q_type} type question with {difficulty} difficulty about: {text}
     Focus on: {keyword}
 
@@ -235,35 +269,44 @@ def generate_question(text, keyword, q_type, difficulty):
     D) [Option 4]
     Answer: [Correct letter]
     """
+
+def parse_single_question(raw_output, keyword):
+    lines = raw_output.split('\n')
+    question = ""
+    options = []
+
+    for line in lines:
+        line = line.strip()
+        if line.startswith('Question:'):
+            question = line.replace('Question:', '').strip()
+        elif line.startswith(('A)', 'B)', 'C)', 'D)')):
+            options.append(line[3:].strip())
+
+    return {"question": question or f"Question about {keyword}", "options": options or ["Option A", "Option B", "Option C", "Option D"]}
+
+def generate_question(text, keyword, q_type, difficulty):
+    prompt = build_single_prompt(text, keyword, q_type, difficulty)
     try:
-        response = model.generate_content(prompt)
-        raw_output = response.text.strip()
-        
-        lines = raw_output.split('\n')
-        question = ""
-        options = []
-        
-        for line in lines:
-            line = line.strip()
-            if line.startswith('Question:'):
-                question = line.replace('Question:', '').strip()
-            elif line.startswith(('A)', 'B)', 'C)', 'D)')):
-                options.append(line[3:].strip())
-        
-        return {"question": question or f"Question about {keyword}", "options": options or ["Option A", "Option B", "Option C", "Option D"]}
+        response = upstream.generate_content(prompt)
+        return parse_single_question(response.text.strip(), keyword)
+    except UpstreamUnavailable as e:
+        logging.warning(f"Skipping single question generation: {e}")
+        return None
     except Exception as e:
         logging.error(f"Error generating question: {e}")
         return None
 
-# 🔁 Retry logic with exponential backoff (optimized for speed)
-def retry_generate_question(text, keyword, q_type, difficulty, retries=2, delay=1):
+# 🔁 Retry logic without sleeping in the request thread: pacing is the upstream token
+# bucket's job, and retries stop as soon as the circuit opens or the budget runs out
+def retry_generate_question(text, keyword, q_type, difficulty, retries=2):
     for attempt in range(retries):
         result = generate_question(text, keyword, q_type, difficulty)
         if result:
             return result
+        if not upstream.available():
+            logging.warning(f"Upstream unavailable, not retrying {q_type} question with keyword '{keyword}'.")
+            break
         logging.warning(f"Retry {attempt + 1} failed for {q_type} question with keyword '{keyword}'. Retrying...")
-        if attempt < retries - 1:  # Don't sleep on last attempt
-            time.sleep(delay * (1.5 ** attempt))  # Reduced exponential factor
     logging.error(f"Failed to generate {q_type} question after {retries} attempts.")
     return None
 
@@ -273,14 +316,144 @@ def highlight_keyword(text):
     return random.choice(words) if words else "concept"
 
 # 🚀 Performance: Cache helper functions
-def get_cache_key(text, q_type, difficulty, num_questions):
-    """Generate a cache key for the request"""
-    return f"{text}_{q_type}_{difficulty}_{num_questions}".lower().replace(" ", "_")
+def get_cache_key(text, q_type, difficulty):
+    """Generate a cache key for the request (independent of num_questions)"""
+    return f"{normalize_topic(text)}_{q_type}_{difficulty}".lower().replace(" ", "_")
 
 def is_cache_valid(cache_entry):
     """Check if cache entry is still valid"""
     return datetime.now() - cache_entry['timestamp'] < CACHE_EXPIRY
 
+def get_cached_payload(cache_key, num_questions):
+    """Serve num_questions from any valid cached batch holding at least that many.
+
+    The response body is encoded once per (entry, num_questions) and reused as bytes."""
+    entry = question_cache.get(cache_key)
+    if entry is None or not is_cache_valid(entry):
+        return None
+    questions = entry['questions']
+    if len(questions) < num_questions:
+        return None
+    payload = entry['encoded'].get(num_questions)
+    if payload is None:
+        payload = entry['encoded'][num_questions] = EncodedPayload({"questions": questions[:num_questions], "cached": True})
+    return payload
+
+def store_cached_questions(cache_key, questions):
+    """Cache a batch, keeping whichever valid batch is larger"""
+    entry = question_cache.get(cache_key)
+    if entry is not None and is_cache_valid(entry) and len(entry['questions']) >= len(questions):
+        return
+    question_cache[cache_key] = {
+        'questions': questions,
+        'encoded': {},  # num_questions -> EncodedPayload
+        'timestamp': datetime.now()
+    }
+
+    # Clean up old cache entries (simple cleanup)
+    if len(question_cache) > 100:  # Keep cache size reasonable
+        oldest_key = min(question_cache.keys(), key=lambda k: question_cache[k]['timestamp'])
+        del question_cache[oldest_key]
+
+def lookup_pool_questions(cache_key, user_id, num_questions, text):
+    """🧠 Returning users get questions they have not seen yet from the pool. Returns None on a miss."""
+    fresh_questions = question_pool.sample(cache_key, user_id, num_questions)
+    if fresh_questions is not None:
+        logging.info(f"🧠 Pool hit! Serving {len(fresh_questions)} unseen questions to {user_id} for: {text}")
+        question_pool.top_up_if_low(cache_key, user_id)
+        metrics.generation_path.set("pool")
+    return fresh_questions
+
+def lookup_cached_payload(cache_key, num_questions, text):
+    """🚀 Performance: any cached batch with >= num_questions serves this request, pre-encoded"""
+    payload = get_cached_payload(cache_key, num_questions)
+    if payload is not None:
+        logging.info(f"⚡ Cache hit! Returning cached questions for: {text}")
+        metrics.generation_path.set("cache")
+    return payload
+
+def cached_payload_response(payload):
+    """Serve a pre-encoded cache hit without re-serializing; honours If-None-Match"""
+    status, body, headers = payload.select(
+        request.headers.get("If-None-Match"), request.headers.get("Accept-Encoding")
+    )
+    return Response(body, status=status, headers=headers)
+
+def record_generated_questions(cache_key, text, q_type, difficulty, user_id, results):
+    """Cache freshly generated questions and feed them into the pool"""
+    if not results:
+        return
+    store_cached_questions(cache_key, results)
+    fingerprints = question_pool.add(cache_key, text, q_type, difficulty, results)
+    if user_id:
+        question_pool.mark_seen(cache_key, user_id, fingerprints)
+        question_pool.top_up_if_low(cache_key, user_id)
+
+def build_generation_response(results, num_questions, start_time):
+    failed_count = num_questions - len(results)
+    response = {"questions": results}
+
+    if failed_count > 0:
+        response["message"] = random.choice(CREATIVE_ERROR_MESSAGES) + f" {failed_count} questions failed."
+
+    generation_time = time.time() - start_time
+    logging.info(f"✅ Generated {len(results)} questions in {generation_time:.2f} seconds. Failed: {failed_count}")
+
+    response['generation_time'] = round(generation_time, 2)
+    return response
+
+def generation_error_response(error, start_time):
+    logging.error(f"❌ Unexpected error in question generation: {error}")
+    metrics.generation_path.set("error")
+    return {
+        "questions": [],
+        "error": "An unexpected error occurred during question generation",
+        "generation_time": time.time() - start_time
+    }
+
+def clear_question_cache():
+    """Drop every cached batch and pooled question. Returns the number of cache entries removed."""
+    old_size = len(question_cache)
+    question_cache.clear()
+    question_pool.clear()
+    return old_size
+
+def health_payload():
+    return {
+        "status": "healthy",
+        "cache_size": len(question_cache),
+        "uptime": round(metrics.uptime(), 2),
+        "model": "gemini-2.0-flash-lite",
+        "upstream": upstream.stats()
+    }
+
+def cache_stats_payload():
+    valid_entries = sum(1 for entry in question_cache.values() if is_cache_valid(entry))
+    return {
+        "total_entries": len(question_cache),
+        "valid_entries": valid_entries,
+        "expired_entries": len(question_cache) - valid_entries,
+        "cache_expiry_hours": CACHE_EXPIRY.total_seconds() / 3600,
+        "question_pool": question_pool.stats()
+    }
+
+# 📊 Per-endpoint latency, labelled with the generation path that served the request
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    metrics.generation_path.set("none")
+
+@app.after_request
+def record_request_latency(response):
+    start = getattr(g, "request_start", None)
+    if start is not None:
+        metrics.REQUEST_LATENCY.observe(
+            time.perf_counter() - start,
+            endpoint=request.endpoint or "unknown",
+            path=metrics.generation_path.get()
+        )
+    return response
+
 @app.route("/api/generate", methods=["POST"])
 def generate():
     start_time = time.time()
@@ -289,86 +462,59 @@ def generate():
     q_type = data.get("type", "MCQ")
     difficulty = data.get("difficulty", "Easy")
     num_questions = int(data.get("num_questions", 1))
+    user_id = data.get("user_id")
 
     logging.info(f"🚀 Generating {num_questions} {q_type} questions with {difficulty} difficulty for topic: {text}")
 
-    # 🚀 Performance: Check cache first
-    cache_key = get_cache_key(text, q_type, difficulty, num_questions)
-    if cache_key in question_cache and is_cache_valid(question_cache[cache_key]):
-        logging.info(f"⚡ Cache hit! Returning cached questions for: {text}")
-        cached_response = question_cache[cache_key]['data']
-        cached_response['cached'] = True
-        return jsonify(cached_response)
+    cache_key = get_cache_key(text, q_type, difficulty)
+    if user_id:
+        fresh_questions = lookup_pool_questions(cache_key, user_id, num_questions, text)
+        if fresh_questions is not None:
+            return jsonify({"questions": fresh_questions, "cached": True})
+    else:
+        payload = lookup_cached_payload(cache_key, num_questions, text)
+        if payload is not None:
+            return cached_payload_response(payload)
 
     try:
         # 🚀 Performance: Use batch generation for better speed
         if num_questions > 1:
             # Always use batch for multiple questions
+            metrics.generation_path.set("batch")
             results = generate_batch_questions(text, q_type, difficulty, min(num_questions, 10))  # Limit to 10
         else:
             # Single question fallback
+            metrics.generation_path.set("single")
             keyword = highlight_keyword(text)
             single_result = retry_generate_question(text, keyword, q_type, difficulty)
             results = [single_result] if single_result else []
 
-        failed_count = num_questions - len(results)
-        response = {"questions": results}
-
-        if failed_count > 0:
-            response["message"] = random.choice(CREATIVE_ERROR_MESSAGES) + f" {failed_count} questions failed."
-
         # 🚀 Performance: Cache the results
-        question_cache[cache_key] = {
-            'data': response,
-            'timestamp': datetime.now()
-        }
-
-        # Clean up old cache entries (simple cleanup)
-        if len(question_cache) > 100:  # Keep cache size reasonable
-            oldest_key = min(question_cache.keys(), key=lambda k: question_cache[k]['timestamp'])
-            del question_cache[oldest_key]
-
-        generation_time = time.time() - start_time
-        logging.info(f"✅ Generated {len(results)} questions in {generation_time:.2f} seconds. Failed: {failed_count}")
-        
-        response['generation_time'] = round(generation_time, 2)
-        return jsonify(response)
+        record_generated_questions(cache_key, text, q_type, difficulty, user_id, results)
+        return jsonify(build_generation_response(results, num_questions, start_time))
 
     except Exception as e:
-        logging.error(f"❌ Unexpected error in question generation: {e}")
-        return jsonify({
-            "questions": [],
-            "error": "An unexpected error occurred during question generation",
-            "generation_time": time.time() - start_time
-        }), 500
+        return jsonify(generation_error_response(e, start_time)), 500
 
 # 🚀 Performance: Health check endpoint
 @app.route("/api/health", methods=["GET"])
 def health_check():
-    return jsonify({
-        "status": "healthy",
-        "cache_size": len(question_cache),
-        "uptime": time.time(),
-        "model": "gemini-2.0-flash-lite"
-    })
+    return jsonify(health_payload())
+
+# 📊 Prometheus metrics endpoint
+@app.route("/metrics", methods=["GET"])
+def prometheus_metrics():
+    return Response(metrics.render_latest(), content_type=metrics.CONTENT_TYPE)
 
 # 🚀 Performance: Cache stats endpoint
 @app.route("/api/cache/stats", methods=["GET"])
 def cache_stats():
-    valid_entries = sum(1 for entry in question_cache.values() if is_cache_valid(entry))
-    return jsonify({
-        "total_entries": len(question_cache),
-        "valid_entries": valid_entries,
-        "expired_entries": len(question_cache) - valid_entries,
-        "cache_expiry_hours": CACHE_EXPIRY.total_seconds() / 3600
-    })
+    return jsonify(cache_stats_payload())
 
 # 🚀 Performance: Clear cache endpoint (for debugging)
 @app.route("/api/cache/clear", methods=["POST"])
 def clear_cache():
-    global question_cache
-    old_size = len(question_cache)
-    question_cache = {}
+    old_size = clear_question_cache()
     return jsonify({
         "message": f"Cache cleared. Removed {old_size} entries.",
         "cache_size": len(question_cache)
@@ -378,18 +524,17 @@ def clear_cache():
 @app.route("/api/get_attempt/<user_id>", methods=["GET"])
 def get_attempt(user_id):
     """Return how many times the user has attempted"""
-    attempt = user_attempts.get(user_id, 0)
+    attempt = attempt_store.get(user_id)
     return jsonify({ "attempt": attempt })
 
 @app.route("/api/increment_attempt/<user_id>", methods=["POST"])
 def increment_attempt(user_id):
     """Increment attempt count for a user unless maxed"""
-    current = user_attempts.get(user_id, 0)
-    if current >= MAX_ATTEMPTS:
+    incremented, attempt = attempt_store.increment_if_below(user_id, MAX_ATTEMPTS)
+    if not incremented:
         return jsonify({ "error": "Max attempts reached" }), 403
 
-    user_attempts[user_id] = current + 1
-    return jsonify({ "attempt": user_attempts[user_id] })
+    return jsonify({ "attempt": attempt })
 
 if __name__ == '__main__':
     logging.info("🚀 Starting AI Question Generator Server...")
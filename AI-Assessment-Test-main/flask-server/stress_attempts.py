@@ -0,0 +1,70 @@
+"""
+Concurrency stress test for attempt_store.
+
+Hammers increment_if_below from many threads (and, for SQLite, many processes)
+and checks that no user ever ends up above the limit.
+
+    python stress_attempts.py
+"""
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+import concurrent.futures
+
+from attempt_store import InMemoryAttemptStore, SQLiteAttemptStore
+
+LIMIT = 3
+USERS = 50
+CALLS_PER_USER = 40
+THREADS = 32
+PROCESSES = 4
+
+
+def _hammer(store, users, calls_per_user, threads):
+    jobs = [f"user-{u}" for u in range(users) for _ in range(calls_per_user)]
+    with concurrent.futures.ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(lambda user_id: store.increment_if_below(user_id, LIMIT)[0], jobs))
+    return sum(results)
+
+
+def _hammer_sqlite_process(path):
+    return _hammer(SQLiteAttemptStore(path), USERS, CALLS_PER_USER // PROCESSES, THREADS // PROCESSES)
+
+
+def check(name, store, granted):
+    over = [f"user-{u}" for u in range(USERS) if store.get(f"user-{u}") != LIMIT]
+    ok = granted == USERS * LIMIT and not over
+    print(f"{'✅' if ok else '❌'} {name}: granted {granted} increments (expected {USERS * LIMIT}), wrong counters: {len(over)}")
+    return ok
+
+
+def main():
+    ok = True
+
+    start = time.time()
+    store = InMemoryAttemptStore()
+    ok &= check("in-memory, threads", store, _hammer(store, USERS, CALLS_PER_USER, THREADS))
+    print(f"   {USERS * CALLS_PER_USER} calls in {time.time() - start:.2f}s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "attempts.db")
+        start = time.time()
+        store = SQLiteAttemptStore(path)
+        ok &= check("sqlite, threads", store, _hammer(store, USERS, CALLS_PER_USER, THREADS))
+        print(f"   {USERS * CALLS_PER_USER} calls in {time.time() - start:.2f}s")
+
+        path = os.path.join(tmp, "attempts-mp.db")
+        SQLiteAttemptStore(path)
+        start = time.time()
+        with multiprocessing.Pool(PROCESSES) as pool:
+            granted = sum(pool.map(_hammer_sqlite_process, [path] * PROCESSES))
+        ok &= check("sqlite, processes", SQLiteAttemptStore(path), granted)
+        print(f"   {USERS * (CALLS_PER_USER // PROCESSES) * PROCESSES} calls in {time.time() - start:.2f}s")
+
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
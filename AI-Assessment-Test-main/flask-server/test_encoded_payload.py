@@ -0,0 +1,43 @@
+import gzip
+import unittest
+
+from encoded_payload import EncodedPayload, accepts_gzip
+
+
+class AcceptEncodingTest(unittest.TestCase):
+    def test_q_values(self):
+        self.assertTrue(accepts_gzip("gzip, deflate, br"))
+        self.assertTrue(accepts_gzip("deflate;q=0.5, GZIP;q=0.8, identity;q=0.5"))
+        self.assertTrue(accepts_gzip("*"))
+        self.assertFalse(accepts_gzip("gzip;q=0"))
+        self.assertFalse(accepts_gzip("gzip; q=0.000, deflate"))
+        self.assertFalse(accepts_gzip("*;q=0, identity"))
+        self.assertFalse(accepts_gzip("gzip;q=0.5"))  # identity is implicitly preferred
+        self.assertFalse(accepts_gzip(None))
+
+
+class EncodedPayloadTest(unittest.TestCase):
+    def setUp(self):
+        self.payload = EncodedPayload({"questions": ["what is a compiler?"] * 100, "cached": True})
+
+    def test_gzip_and_identity_have_distinct_etags(self):
+        status, body, headers = self.payload.select(accept_encoding="gzip")
+        self.assertEqual((status, headers["Content-Encoding"]), (200, "gzip"))
+        self.assertEqual(gzip.decompress(body), self.payload.body)
+        gzip_etag = headers["ETag"]
+
+        status, body, headers = self.payload.select(accept_encoding="gzip;q=0")
+        self.assertEqual((status, body), (200, self.payload.body))
+        self.assertNotIn("Content-Encoding", headers)
+        self.assertNotEqual(headers["ETag"], gzip_etag)
+
+    def test_if_none_match_accepts_either_tag(self):
+        for tag in (self.payload.etag, self.payload.gzip_etag, f"W/{self.payload.gzip_etag}"):
+            for accept_encoding in ("gzip", "identity"):
+                status, body, _ = self.payload.select(tag, accept_encoding)
+                self.assertEqual((status, body), (304, b""))
+        self.assertEqual(self.payload.select('"other"', "gzip")[0], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
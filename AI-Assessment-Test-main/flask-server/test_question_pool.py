@@ -0,0 +1,31 @@
+import unittest
+
+from question_pool import QuestionPool, question_fingerprint
+
+
+def _questions(texts):
+    return [{"question": text, "options": ["a", "b", "c", "d"], "answer": "A"} for text in texts]
+
+
+class QuestionPoolDedupTest(unittest.TestCase):
+    def setUp(self):
+        self.pool = QuestionPool(refill=lambda *args: [])
+
+    def test_non_latin_questions_are_distinct(self):
+        texts = ["什么是微积分的基本定理？", "导数的几何意义是什么？", "极限的定义是什么？",
+                 "Τι είναι η παράγωγος μιας συνάρτησης;", "Ποιο είναι το όριο μιας ακολουθίας;"]
+        self.assertEqual(len({question_fingerprint(text) for text in texts}), len(texts))
+        fingerprints = self.pool.add("数学_mcq_easy", "数学", "mcq", "easy", _questions(texts))
+        self.assertEqual(len(set(fingerprints)), len(texts))
+        self.assertEqual(len(self.pool.sample("数学_mcq_easy", "u1", len(texts))), len(texts))
+
+    def test_near_duplicates_still_collapse(self):
+        fingerprints = self.pool.add("k", "t", "mcq", "easy", _questions([
+            "什么是微积分的基本定理？", "什么是微积分的基本定理",
+            "What is the main purpose of a compiler?", "what is the MAIN purpose of a compiler",
+        ]))
+        self.assertEqual(len(set(fingerprints)), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
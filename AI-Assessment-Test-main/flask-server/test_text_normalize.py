@@ -0,0 +1,26 @@
+import unittest
+
+from text_normalize import normalize_topic, normalize_words
+
+
+class NormalizeTopicTest(unittest.TestCase):
+    def test_trivial_spelling_differences_share_a_key(self):
+        self.assertEqual(normalize_topic("  Machine-Learning!! "), normalize_topic("machine learning"))
+
+    def test_keeps_plus_and_hash(self):
+        self.assertEqual(normalize_topic("C++ and C#"), "c++ and c#")
+
+    def test_non_latin_topics_are_kept_and_distinct(self):
+        topics = ["数学", "物理", "Ελληνικά", "हिन्दी व्याकरण", "Física"]
+        normalized = [normalize_topic(topic) for topic in topics]
+        self.assertEqual(normalized, ["数学", "物理", "ελληνικά", "हिन्दी व्याकरण", "física"])
+        self.assertEqual(len(set(normalized)), len(topics))
+
+    def test_nfkc_and_casefold(self):
+        self.assertEqual(normalize_topic("ＰＹＴＨＯＮ"), "python")      # full-width
+        self.assertEqual(normalize_topic("Fi\u0301sica"), "f\u00edsica")  # decomposed accent
+        self.assertEqual(normalize_words("Straße"), ["strasse"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unicodedata
+
+# 🔤 Unicode-aware word splitting shared by the topic cache keys and question-pool
+# fingerprints, so "数学", "Física" and "हिन्दी" survive normalization intact.
+
+WORD_SYMBOLS = "+#"   # kept inside words: c++, c#, f#
+
+
+def _is_word_char(char):
+    # str.isalnum() covers letters and digits in every script; combining marks (Mn/Mc/Me)
+    # are needed too, or Indic vowel signs and NFKC-resistant accents split words apart
+    return char.isalnum() or char in WORD_SYMBOLS or unicodedata.category(char)[0] == "M"
+
+
+def normalize_words(text):
+    """NFKC-normalized, casefolded words of text; punctuation and whitespace separate words"""
+    words, current = [], []
+    for char in unicodedata.normalize("NFKC", text).casefold():
+        if _is_word_char(char):
+            current.append(char)
+        elif current:
+            words.append("".join(current))
+            current = []
+    if current:
+        words.append("".join(current))
+    return words
+
+
+def normalize_topic(text):
+    """Normalize a topic string so trivially different spellings share a cache entry"""
+    return " ".join(normalize_words(text))
@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import threading
+import time
+
+import metrics
+
+# 🛡️ Shared upstream client for Gemini calls: token-bucket rate limiting, a circuit
+# breaker that fails fast to the template fallback, and an AIMD concurrency limit
+# that shrinks on 429s / slow responses and grows back while the API is healthy.
+
+REQUESTS_PER_SECOND = 2.0     # sustained Gemini call rate per process
+BURST_SIZE = 5                # token bucket capacity
+ACQUIRE_TIMEOUT = 0.5         # max seconds a request thread waits for a token / slot
+FAILURE_THRESHOLD = 5         # consecutive failures before the circuit opens
+RESET_TIMEOUT = 30            # seconds the circuit stays open before a trial call
+INITIAL_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 16
+TARGET_LATENCY = 8.0          # seconds; slower successful calls shrink the limit
+ASYNC_POLL_INTERVAL = 0.02    # seconds between budget checks in async mode
+
+
+class UpstreamUnavailable(Exception):
+    """Raised instead of calling Gemini when the circuit is open or we are over our rate/concurrency budget"""
+
+
+def is_throttled(error):
+    """True if the upstream error is a quota / rate-limit (HTTP 429) response"""
+    if getattr(error, "code", None) == 429:
+        return True
+    return type(error).__name__ in ("ResourceExhausted", "TooManyRequests") or "429" in str(error)
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self):
+        with self._lock:
+            self._refill()
+            return self._tokens >= 1
+
+    def try_acquire(self, timeout=0.0):
+        """Take one token, waiting at most timeout seconds for the bucket to refill"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or wait > remaining:
+                return False
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def _current_state(self):
+        if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+        return self.state
+
+    def available(self):
+        with self._lock:
+            state = self._current_state()
+            return state == self.CLOSED or (state == self.HALF_OPEN and not self._trial_in_flight)
+
+    def allow(self):
+        """Claim permission for one call; in half-open state only a single trial call is let through"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        """Give back a claimed half-open trial whose call never finished (e.g. it was cancelled)"""
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logging.warning(f"⚡ Circuit opened after {self._failures} upstream failures")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+
+class AdaptiveConcurrencyLimit:
+    """AIMD limit: +1 after a full window of fast successes, halved on 429 or slow calls"""
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, minimum=MIN_CONCURRENCY,
+                 maximum=MAX_CONCURRENCY, target_latency=TARGET_LATENCY):
+        self.limit = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.in_flight = 0
+        self._successes = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.in_flight < self.limit, timeout=timeout):
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency=None, throttled=False):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled or (latency is not None and latency > self.target_latency):
+                self.limit = max(self.minimum, self.limit // 2)
+                self._successes = 0
+            elif latency is not None:
+                self._successes += 1
+                if self._successes >= self.limit:
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self._successes = 0
+            self._cond.notify_all()
+
+
+class UpstreamClient:
+    """Wraps a GenerativeModel so every Gemini call goes through one shared budget"""
+
+    def __init__(self, model, rate=REQUESTS_PER_SECOND, burst=BURST_SIZE, acquire_timeout=ACQUIRE_TIMEOUT):
+        self.model = model
+        self.acquire_timeout = acquire_timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker()
+        self.concurrency = AdaptiveConcurrencyLimit()
+
+    def available(self):
+        """Cheap check used to skip straight to templates instead of queueing doomed calls"""
+        return self.breaker.available() and self.bucket.available()
+
+    def _reject(self, reason, message):
+        metrics.UPSTREAM_REJECTED.inc(reason=reason)
+        raise UpstreamUnavailable(message)
+
+    def _check_circuit(self):
+        if not self.breaker.available():
+            self._reject("circuit_open", "circuit open")
+
+    def _claim_call(self):
+        """Final breaker check once a token and a slot are held (claims the half-open trial)"""
+        if not self.breaker.allow():
+            self.concurrency.release()
+            self._reject("circuit_open", "circuit open")
+
+    def _record_failure(self, error, latency):
+        throttled = is_throttled(error)
+        self.concurrency.release(throttled=throttled)
+        self.breaker.record_failure()
+        metrics.UPSTREAM_LATENCY.observe(latency, outcome="throttled" if throttled else "error")
+        if throttled:
+            logging.warning(f"🐢 Gemini throttled us; concurrency limit now {self.concurrency.limit}")
+
+    def _abandon_call(self):
+        """Call ended without an outcome (cancelled / interrupted): free the slot and trial, no AIMD signal"""
+        self.concurrency.release()
+        self.breaker.release_trial()
+
+    def _record_success(self, latency, prompt, response):
+        self.concurrency.release(latency=latency)
+        self.breaker.record_success()
+        metrics.UPSTREAM_LATENCY.observe(latency, outcome="success")
+        metrics.record_tokens(prompt, response)
+
+    def generate_content(self, prompt, **kwargs):
+        self._check_circuit()
+        if not self.bucket.try_acquire(self.acquire_timeout):
+            self._reject("rate_limit", "rate limit budget exhausted")
+        if not self.concurrency.acquire(self.acquire_timeout):
+            self._reject("concurrency_limit", f"concurrency limit {self.concurrency.limit} reached")
+        self._claim_call()
+
+        start = time.monotonic()
+        try:
+            response = self.model.generate_content(prompt, **kwargs)
+        except Exception as e:
+            self._record_failure(e, time.monotonic() - start)
+            raise
+        except BaseException:
+            # asyncio.CancelledError (FALLBACK_DEADLINE in asgi_server) and KeyboardInterrupt
+            # are not Exceptions; without this the slot and half-open trial would leak
+            self._abandon_call()
+            raise
+        self._record_success(time.monotonic() - start, prompt, response)
+        return response
+
+    async def _poll(self, try_acquire):
+        """Async counterpart of the blocking acquires: poll without holding a thread"""
+        deadline = time.monotonic() + self.acquire_timeout
+        while not try_acquire():
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(ASYNC_POLL_INTERVAL)
+        return True
+
+    async def generate_content_async(self, prompt, **kwargs):
+        """Same budget as generate_content, but waits on the event loop instead of a thread"""
+        self._check_circuit()
+        if not await self._poll(lambda: self.bucket.try_acquire(0)):
+            self._reject("rate_limit", "rate limit budget exhausted")
+        if not await self._poll(lambda: self.concurrency.acquire(0)):
+            self._reject("concurrency_limit", f"concurrency limit {self.concurrency.limit} reached")
+        self._claim_call()
+
+        start = time.monotonic()
+        try:
+            response = await self.model.generate_content_async(prompt, **kwargs)
+        except Exception as e:
+            self._record_failure(e, time.monotonic() - start)
+            raise
+        except BaseException:
+            # asyncio.CancelledError (FALLBACK_DEADLINE in asgi_server) and KeyboardInterrupt
+            # are not Exceptions; without this the slot and half-open trial would leak
+            self._abandon_call()
+            raise
+        self._record_success(time.monotonic() - start, prompt, response)
+        return response
+
+    def stats(self):
+        return {
+            "circuit": self.breaker.state,
+            "concurrency_limit": self.concurrency.limit,
+            "in_flight": self.concurrency.in_flight,
+        }